@@ -0,0 +1,133 @@
+"""Offline micro-benchmarks of the hot paths, reporting ops/sec and peak allocation per op.
+
+    python -m benchmarks                      # everything
+    python -m benchmarks transfers            # only benchmarks whose name contains "transfers"
+    python -m benchmarks --save before.json   # keep the results...
+    python -m benchmarks --compare before.json  # ...and show the change against them later
+"""
+
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Callable, Iterator
+
+import httpx
+
+from fastexchange.converter.cache import RateCache
+from fastexchange.converter.clients import CurrencyMeUkClient
+from fastexchange.crypto.matching import PaymentMatcher
+from fastexchange.crypto.schema import Transfers, TransferSummaries
+from fastexchange.currency import AnyCurrency, CurrencyEnum, EURCurrency, Money, USDCurrency
+from fastexchange.http import BaseClient
+from fastexchange.minor import MinorUnits
+
+from . import harness, payloads
+
+Case = tuple[str, Callable[[], object]]
+
+
+def currency_cases() -> Iterator[Case]:
+    a = USDCurrency(val=Decimal("125.50"))
+    b = USDCurrency(val=Decimal("99.99"))
+    yield "BaseCurrency add", lambda: a + b
+
+    def validated_add(x: USDCurrency, y: USDCurrency) -> USDCurrency:
+        # what `+` cost when every result was validated, to compare against
+        x.check_if_self(y)
+        return USDCurrency(c_type=x.c_type, val=x.val + y.val)
+
+    yield "BaseCurrency validated add", lambda: validated_add(a, b)
+    yield "BaseCurrency sub", lambda: a - b
+    yield "BaseCurrency lt", lambda: a < b
+    yield "BaseCurrency eq", lambda: a == b
+    yield "BaseCurrency convert_to", lambda: a.convert_to(CurrencyEnum.EURO, Decimal("0.92"))
+    money_a, money_b = Money.from_model(a), Money.from_model(b)
+    yield "Money add", lambda: money_a + money_b
+    yield "Money to_model", money_a.to_model
+    minor_a, minor_b = a.to_minor(), b.to_minor()
+    yield "MinorUnits add", lambda: minor_a + minor_b
+    yield "MinorUnits lt", lambda: minor_a < minor_b
+    ledger = [USDCurrency(val=Decimal(i) / 100) for i in range(1000)]
+    yield "ledger sum 1k BaseCurrency", lambda: sum(ledger[1:], ledger[0])
+    minor_ledger = [amount.to_minor() for amount in ledger]
+    yield "ledger total 1k MinorUnits", lambda: MinorUnits.total(USDCurrency, minor_ledger)
+    data = {"c_type": "USD", "val": "125.50"}
+    yield "AnyCurrency validate_python", lambda: AnyCurrency.validate_python(data)
+    raw = b'{"c_type": "EURO", "val": "125.50"}'
+    yield "AnyCurrency validate_json", lambda: AnyCurrency.validate_json(raw)
+
+
+def transfer_cases() -> Iterator[Case]:
+    for size in (50, 10_000):
+        page = payloads.transfers_page(size)
+        yield f"Transfers validate_json {size}", lambda p=page: Transfers.model_validate_json(p)
+        yield (
+            f"TransferSummaries validate_json {size}",
+            lambda p=page: TransferSummaries.model_validate_json(p),
+        )
+    transfer = Transfers.model_validate_json(payloads.transfers_page(1)).token_transfers[0]
+    yield "TokenTransfer to_usd", transfer.to_usd
+
+
+def matching_cases() -> Iterator[Case]:
+    # 100k open invoices on 20k addresses, and a page paying 50 of them
+    expires = datetime.now() + timedelta(days=1)
+    page = Transfers.model_validate_json(payloads.transfers_page(50)).token_transfers
+    invoices = [
+        (f"inv{i}", f"TShop{i % 20_000}", 1_000_000 * (i % 1000 + 1)) for i in range(100_000)
+    ]
+    paid = [
+        (f"paid{i}", transfer.to_address, int(transfer.quant)) for i, transfer in enumerate(page)
+    ]
+
+    def match() -> object:
+        matcher.match(page)
+        # reopen the paid invoices, so every run matches the same page
+        for invoice_id, address, quant in paid:
+            matcher.add(invoice_id, address, quant, expires)
+        return None
+
+    # with no history, the page's transfers are forgotten as soon as their invoices are paid
+    matcher = PaymentMatcher(history=0)
+    for invoice_id, address, quant in [*invoices, *paid]:
+        matcher.add(invoice_id, address, quant, expires)
+    yield "PaymentMatcher match and reopen 50 of 100k", match
+
+
+def exchange_cases() -> Iterator[Case]:
+    page = payloads.conversion_page()
+    loop = asyncio.new_event_loop()
+    client = BaseClient(
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, content=page))
+    )
+    usd = USDCurrency(val=Decimal(100))
+    for name, cache in (("fetched", RateCache(ttl=0)), ("cached", RateCache())):
+        converter = CurrencyMeUkClient(client, cache)
+        yield (
+            f"CurrencyMeUkClient exchange {name}",
+            lambda c=converter: loop.run_until_complete(c.exchange(usd, EURCurrency)),
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("filter", nargs="?", default="", help="run names containing this")
+    parser.add_argument("--save", metavar="PATH", help="write the results as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="compare to results saved earlier")
+    args = parser.parse_args()
+
+    baseline = harness.load(args.compare) if args.compare else {}
+    results = []
+    for cases in (currency_cases, transfer_cases, matching_cases, exchange_cases):
+        for name, fn in cases():
+            if args.filter.lower() in name.lower():
+                result = harness.measure(name, fn)
+                harness.report(result, baseline.get(name))
+                results.append(result)
+    if args.save:
+        harness.save(results, args.save)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Measuring and reporting for the benchmark suite, see `python -m benchmarks --help`"""
+
+import json
+import timeit
+import tracemalloc
+from typing import Callable, NamedTuple, Union
+
+
+class Result(NamedTuple):
+    name: str
+    per_op: float
+    """Seconds per operation, the best of the repeats"""
+    allocated: int
+    """Peak bytes allocated by one operation, as tracemalloc sees it"""
+
+    @property
+    def ops_per_sec(self) -> float:
+        return 1 / self.per_op
+
+
+def measure(name: str, fn: Callable[[], object], repeat: int = 5) -> Result:
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    per_op = min(timer.repeat(repeat=repeat, number=number)) / number
+
+    # separately from timing, tracemalloc slows everything down
+    fn()
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return Result(name, per_op, max(0, peak - before))
+
+
+def format_size(size: float) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.0f} GiB"
+
+
+def report(result: Result, baseline: Union[Result, None] = None) -> None:
+    change = ""
+    if baseline is not None:
+        change = f"  {(result.per_op / baseline.per_op - 1) * 100:+.1f}%"
+    print(
+        f"{result.name:<44} {result.ops_per_sec:>14,.0f} ops/s {result.per_op * 1e6:>11.2f} us"
+        f" {format_size(result.allocated):>10}{change}"
+    )
+
+
+def save(results: list[Result], path: str) -> None:
+    with open(path, "w") as f:
+        json.dump({r.name: r._asdict() for r in results}, f, indent=2)
+
+
+def load(path: str) -> dict[str, Result]:
+    with open(path) as f:
+        return {name: Result(**fields) for name, fields in json.load(f).items()}
@@ -0,0 +1,83 @@
+"""Offline stand-ins for what tronscan and currency.me.uk send back, sized like the real thing"""
+
+import json
+from typing import Any
+
+USDT_CONTRACT = "TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6t"
+WALLET = "TNXoiAJ3dct8Fjg4M9fkLFh9S2v9TXc32G"
+BASE_TS = 1_700_000_000_000
+
+TOKEN_INFO = {
+    "tokenId": USDT_CONTRACT,
+    "tokenAbbr": "USDT",
+    "tokenName": "Tether USD",
+    "tokenDecimal": 6,
+    "tokenCanShow": 1,
+    "tokenType": "trc20",
+    "tokenLogo": "https://static.tronscan.org/production/logo/usdtlogo.png",
+    "tokenLevel": "2",
+    "issuerAddr": "THPvaUhoh2Qn2y9THCZML3H815hhFhn5YC",
+    "vip": True,
+}
+
+
+def token_transfer(index: int) -> dict[str, Any]:
+    return {
+        "transaction_id": f"{index:064x}",
+        "status": 0,
+        "block_ts": BASE_TS - index * 3000,
+        "from_address": f"TSender{index % 97:027d}",
+        "to_address": WALLET,
+        "block": 56_000_000 - index,
+        "contract_address": USDT_CONTRACT,
+        "quant": str(1_000_000 * (index % 1000 + 1) + index % 7),
+        "approval_amount": "0",
+        "event_type": "Transfer",
+        "contract_type": "trc20",
+        "confirmed": index > 20,
+        "contractRet": "SUCCESS",
+        "finalResult": "SUCCESS",
+        "tokenInfo": TOKEN_INFO,
+        "fromAddressIsContract": False,
+        "toAddressIsContract": False,
+        "revert": False,
+        "riskTransaction": False,
+    }
+
+
+def transfers_page(size: int) -> bytes:
+    return json.dumps(
+        {
+            "total": size,
+            "rangeTotal": size,
+            "contractInfo": {},
+            "token_transfers": [token_transfer(i) for i in range(size)],
+            "normalAddressInfo": {},
+        }
+    ).encode()
+
+
+def conversion_page(rate: str = "0.9234") -> bytes:
+    """A page laid out like currency.me.uk's converter: a long head, navigation, the form with
+    the answer, then rate tables and footer
+    """
+    head = "".join(
+        f'<link rel="preload" href="/assets/{i}.css" as="style"><script src="/js/{i}.js"></script>'
+        for i in range(40)
+    )
+    nav = "".join(
+        f'<li><a href="/convert/usd/c{i:03d}">USD to C{i:03d}</a></li>' for i in range(150)
+    )
+    form = (
+        '<form id="convert" method="get"><input type="text" id="amount" name="amount" value="1">'
+        '<select id="from"><option value="USD" selected>USD</option></select>'
+        f'<input type="text" id="answer" name="answer" value="{rate}" readonly></form>'
+    )
+    tables = "".join(
+        f"<tr><td>{i} USD</td><td>{i * float(rate):.2f} EUR</td></tr>" for i in range(1, 400)
+    )
+    return (
+        f"<!DOCTYPE html><html><head><title>USD to EUR</title>{head}</head><body>"
+        f"<nav><ul>{nav}</ul></nav><main>{form}<table>{tables}</table></main>"
+        "<footer>currency.me.uk</footer></body></html>"
+    ).encode()
@@ -1,18 +1,63 @@
-from .converter.clients import CurrencyMeUkClient
-from .crypto.types import UsdtTrcToken
-from .crypto.usdt import Transfers, Trc20Gateway
-from .currency import AnyCurrency, BaseCurrency, EURCurrency, USDCurrency
-from .exceptions import CantCompareException, ConverterNotMapped
+"""Names are imported on first access, so `from fastexchange import USDCurrency` doesn't pay for
+httpx, lxml or the crypto models, which matters for short-lived processes
+"""
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .batch import CurrencyBatch
+    from .converter.clients import CurrencyMeUkClient
+    from .crypto.types import UsdtTrcToken
+    from .crypto.usdt import Transfers, Trc20Gateway
+    from .currency import AnyCurrency, BaseCurrency, EURCurrency, Money, USDCurrency
+    from .exceptions import CantCompareException, ConverterNotMapped, RateNotAvailable
+    from .minor import MinorUnits
+
+_MODULES = {
+    "CurrencyMeUkClient": ".converter.clients",
+    "BaseCurrency": ".currency",
+    "CurrencyBatch": ".batch",
+    "USDCurrency": ".currency",
+    "EURCurrency": ".currency",
+    "AnyCurrency": ".currency",
+    "Money": ".currency",
+    "MinorUnits": ".minor",
+    "Trc20Gateway": ".crypto.usdt",
+    "Transfers": ".crypto.usdt",
+    "ConverterNotMapped": ".exceptions",
+    "CantCompareException": ".exceptions",
+    "RateNotAvailable": ".exceptions",
+    "UsdtTrcToken": ".crypto.types",
+}
+"""Module each public name lives in"""
 
 __all__ = [
     "CurrencyMeUkClient",
     "BaseCurrency",
+    "CurrencyBatch",
     "USDCurrency",
     "EURCurrency",
     "AnyCurrency",
+    "Money",
+    "MinorUnits",
     "Trc20Gateway",
     "Transfers",
     "ConverterNotMapped",
     "CantCompareException",
+    "RateNotAvailable",
     "UsdtTrcToken",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    module = _MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *__all__])
@@ -0,0 +1,154 @@
+import operator
+from array import array
+from decimal import ROUND_HALF_EVEN, Decimal
+from itertools import compress, repeat
+from typing import Callable, Generic, Iterable, Iterator, Sequence, Union
+
+from typing_extensions import Self
+
+from .currency import CT, CURRENCY_MODELS, BaseCurrency, OtherCT
+from .exceptions import CantCompareException
+
+DEFAULT_SCALE = 6
+"""Default number of decimal places kept by a batch"""
+
+
+def round_div(numerator: int, denominator: int) -> int:
+    """Integer division rounded half to even, like `ROUND_HALF_EVEN` does for Decimals"""
+    quotient, remainder = divmod(numerator, denominator)
+    twice = 2 * remainder
+    if twice > denominator or (twice == denominator and quotient % 2 == 1):
+        quotient += 1
+    return quotient
+
+
+class CurrencyBatch(Generic[CT]):
+    """Many values of a single currency type, stored as fixed-point integers in a compact array.
+    Each value is kept as an integer number of `10 ** -scale` units, rounding half to even when a
+    Decimal with more places is added to the batch. Arithmetic and comparisons run over plain
+    integers, and like `BaseCurrency`, mixing currency types raises `CantCompareException`.
+    The scale is not the currency's `minor_scale` (2 for cents, see `MinorUnits`) unless asked
+    for, the default keeps the extra places rates leave behind.
+    Units are 64-bit, so values are limited to about 9.2e12 at the default scale; building a
+    batch or doing arithmetic past that raises `ValueError`.
+    """
+
+    __slots__ = ("c_type", "scale", "_units")
+
+    def __init__(self, c_type: CT, units: Iterable[int] = (), scale: int = DEFAULT_SCALE) -> None:
+        self.c_type = c_type
+        self.scale = scale
+        try:
+            self._units = array("q", units)
+        except OverflowError:
+            raise ValueError(f"A value doesn't fit in 64 bits at scale {scale}") from None
+
+    @classmethod
+    def from_values(
+        cls, c_type: CT, values: Iterable[Decimal], scale: int = DEFAULT_SCALE
+    ) -> "CurrencyBatch[CT]":
+        return cls(c_type, (_to_units(value, scale) for value in values), scale)
+
+    @classmethod
+    def from_currencies(
+        cls,
+        currencies: Sequence[BaseCurrency[CT]],
+        c_type: Union[CT, None] = None,
+        scale: int = DEFAULT_SCALE,
+    ) -> "CurrencyBatch[CT]":
+        """Build a batch out of currency models, `c_type` is only needed if `currencies` is empty"""
+        if c_type is None:
+            if not currencies:
+                raise ValueError("c_type is required to build a batch of no currencies")
+            c_type = currencies[0].c_type
+        for currency in currencies:
+            if currency.c_type != c_type:
+                raise CantCompareException(f"Cannot do action {c_type} with {currency.c_type}")
+        return cls.from_values(c_type, (currency.val for currency in currencies), scale)
+
+    def to_currencies(self) -> list[BaseCurrency[CT]]:
+        c_type, trusted = self.c_type, CURRENCY_MODELS[self.c_type]._trusted
+        return [trusted(c_type, value) for value in self.values()]  # type: ignore
+
+    def values(self) -> list[Decimal]:
+        scale = -self.scale
+        return [Decimal(units).scaleb(scale) for units in self._units]
+
+    def units(self) -> array:
+        """The underlying integers, in `10 ** -scale` units"""
+        return self._units
+
+    def check_if_self(self, other: Union["CurrencyBatch[CT]", BaseCurrency[CT]]):
+        if self.c_type != other.c_type:
+            raise CantCompareException(f"Cannot do action {self.c_type} with {other.c_type}")
+
+    def sum(self) -> BaseCurrency[CT]:
+        val = Decimal(sum(self._units)).scaleb(-self.scale)
+        return CURRENCY_MODELS[self.c_type]._trusted(self.c_type, val)  # type: ignore
+
+    def filter(self, mask: Iterable[bool]) -> Self:
+        return self._new(compress(self._units, mask))
+
+    def convert_to(self, other_currency: OtherCT, rate: Decimal) -> "CurrencyBatch[OtherCT]":
+        numerator, denominator = Decimal(rate).as_integer_ratio()
+        units = (round_div(units * numerator, denominator) for units in self._units)
+        return CurrencyBatch(other_currency, units, self.scale)
+
+    def lt(self, other: Union["CurrencyBatch[CT]", BaseCurrency[CT]]) -> list[bool]:
+        return self._compare(other, operator.lt)
+
+    def le(self, other: Union["CurrencyBatch[CT]", BaseCurrency[CT]]) -> list[bool]:
+        return self._compare(other, operator.le)
+
+    def gt(self, other: Union["CurrencyBatch[CT]", BaseCurrency[CT]]) -> list[bool]:
+        return self._compare(other, operator.gt)
+
+    def ge(self, other: Union["CurrencyBatch[CT]", BaseCurrency[CT]]) -> list[bool]:
+        return self._compare(other, operator.ge)
+
+    def eq(self, other: Union["CurrencyBatch[CT]", BaseCurrency[CT]]) -> list[bool]:
+        return self._compare(other, operator.eq)
+
+    def __add__(self, other: Union["CurrencyBatch[CT]", BaseCurrency[CT]]) -> Self:
+        return self._new(map(operator.add, self._units, self._operand(other)))
+
+    def __sub__(self, other: Union["CurrencyBatch[CT]", BaseCurrency[CT]]) -> Self:
+        return self._new(map(operator.sub, self._units, self._operand(other)))
+
+    def __len__(self) -> int:
+        return len(self._units)
+
+    def __iter__(self) -> Iterator[BaseCurrency[CT]]:
+        return iter(self.to_currencies())
+
+    def __getitem__(self, index: int) -> BaseCurrency[CT]:
+        val = Decimal(self._units[index]).scaleb(-self.scale)
+        return CURRENCY_MODELS[self.c_type]._trusted(self.c_type, val)  # type: ignore
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(c_type={self.c_type!r}, len={len(self)})"
+
+    def _new(self, units: Iterable[int]) -> Self:
+        return self.__class__(self.c_type, units, self.scale)
+
+    def _operand(self, other: Union["CurrencyBatch[CT]", BaseCurrency[CT]]) -> Iterable[int]:
+        """Units of `other` to apply element-wise, a single currency is applied to every element"""
+        self.check_if_self(other)
+        if isinstance(other, CurrencyBatch):
+            if other.scale != self.scale:
+                raise ValueError(f"Cannot mix batches of scale {self.scale} and {other.scale}")
+            if len(other) != len(self):
+                raise ValueError(f"Cannot mix batches of length {len(self)} and {len(other)}")
+            return other._units
+        return repeat(_to_units(other.val, self.scale), len(self))
+
+    def _compare(
+        self,
+        other: Union["CurrencyBatch[CT]", BaseCurrency[CT]],
+        op: Callable[[int, int], bool],
+    ) -> list[bool]:
+        return list(map(op, self._units, self._operand(other)))
+
+
+def _to_units(value: Decimal, scale: int) -> int:
+    return int(value.scaleb(scale).to_integral_value(ROUND_HALF_EVEN))
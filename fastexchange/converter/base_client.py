@@ -1,24 +1,208 @@
+import asyncio
+import random
 from abc import ABC, abstractmethod
-from typing import Union
+from datetime import datetime
+from decimal import Decimal
+from types import MappingProxyType
+from typing import Iterable, Mapping, Union
 
 from typing_extensions import TypeVar
 
+from fastexchange.converter.cache import RateCache
+from fastexchange.converter.history import RateHistory, RateSeries
 from fastexchange.converter.mappings import FromToExchange
+from fastexchange.exceptions import ConverterNotMapped, RateNotAvailable
 from fastexchange.http import BaseClient, get_client
+from fastexchange.utils import to_unit_ms
 
-from ..currency import DiscriminatedCurrency
+from ..currency import SUPPORTED_CTS, DiscriminatedCurrency
 
 ToCurrency = TypeVar("ToCurrency", bound=DiscriminatedCurrency)
 
 
+def exchange(from_: DiscriminatedCurrency, to: type[ToCurrency], rate: Decimal) -> ToCurrency:
+    to_type: SUPPORTED_CTS = to.__annotations__["c_type"].__args__[0]
+    result = from_.convert_to(to_type, rate)
+    return result  # type: ignore
+
+
 class BaseConverter(ABC):
     mapping: dict[FromToExchange, str]
 
-    def __init__(self, client: Union[BaseClient, None] = None):
-        self.client = client or get_client()
+    def __init__(
+        self,
+        client: Union[BaseClient, None] = None,
+        cache: Union[RateCache, None] = None,
+        history: Union[RateHistory, None] = None,
+    ):
+        self._client = client
+        self.cache = cache if cache is not None else RateCache()
+        self.history = history
+        """If set, every fetched rate is recorded there, see `exchange_at`"""
+        self._inflight: dict[FromToExchange, asyncio.Task[Decimal]] = {}
+        self.snapshot: Mapping[FromToExchange, Decimal] = MappingProxyType({})
+        """Rates published by the background refresher, replaced as a whole on each refresh"""
+        self.refresh_errors: dict[FromToExchange, Exception] = {}
+        """Pairs that failed on the last refresh, they're served stale from `snapshot` meanwhile"""
+        self._refresher: Union[asyncio.Task[None], None] = None
+
+    @property
+    def client(self) -> BaseClient:
+        """The client given at init, or else the running event loop's shared one"""
+        return self._client if self._client is not None else get_client()
 
     def is_supported(self, from_: type[DiscriminatedCurrency], to: type[ToCurrency]) -> bool:
         return FromToExchange(from_=from_, to=to) in self.mapping
 
+    async def get_rate(self, from_: type[DiscriminatedCurrency], to: type[ToCurrency]) -> Decimal:
+        """Rate of `from_` to `to`, served from cache while it's fresh.
+        Concurrent callers missing the cache for the same pair share one upstream fetch,
+        and if that fetch fails, all of them get its exception.
+        While the background refresher runs, rates come from its snapshot without any I/O.
+        """
+        pair = FromToExchange(from_=from_, to=to)
+        if pair not in self.mapping:
+            raise ConverterNotMapped(
+                f"Unsupported conversion from {from_} to {to} by {self.__class__.__name__}"
+            )
+
+        rate = self.snapshot.get(pair) if self._refresher is not None else None
+        if rate is None:
+            rate = self.cache.get(pair)
+        if rate is not None:
+            return rate
+        return await self._fetch_shared(pair)
+
+    async def _fetch_shared(self, pair: FromToExchange) -> Decimal:
+        task = self._inflight.get(pair)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_and_cache(pair))
+            self._inflight[pair] = task
+            task.add_done_callback(lambda t: self._forget_inflight(pair, t))
+        # shield, so one cancelled caller doesn't cancel the fetch for everyone else
+        return await asyncio.shield(task)
+
+    async def _fetch_and_cache(self, pair: FromToExchange) -> Decimal:
+        rate = await self.fetch_rate(pair)
+        self.cache.set(pair, rate)
+        if self.history is not None:
+            self.history.record(pair, rate)
+        return rate
+
+    def _forget_inflight(self, pair: FromToExchange, task: "asyncio.Task[Decimal]") -> None:
+        if self._inflight.get(pair) is task:
+            del self._inflight[pair]
+        if not task.cancelled():
+            task.exception()  # mark as retrieved, even if every caller was cancelled
+
+    async def refresh(self) -> None:
+        """Fetch every pair in `mapping` and publish them as a new `snapshot`.
+        A pair that fails keeps its previous rate in the snapshot, and is listed in
+        `refresh_errors`.
+        """
+        pairs = list(self.mapping)
+        results = await asyncio.gather(
+            *(self._fetch_shared(pair) for pair in pairs), return_exceptions=True
+        )
+        snapshot = dict(self.snapshot)
+        errors: dict[FromToExchange, Exception] = {}
+        for pair, result in zip(pairs, results):
+            if isinstance(result, Exception):
+                errors[pair] = result
+            elif isinstance(result, Decimal):
+                snapshot[pair] = result
+        self.snapshot = MappingProxyType(snapshot)
+        self.refresh_errors = errors
+
+    async def start_refresher(
+        self, interval: Union[float, None] = None, jitter: float = 0.1
+    ) -> None:
+        """Refresh every pair in the background, so `exchange` never waits on the network.
+        Rates are refreshed every `interval` seconds, by default ahead of the cache's ttl, randomly
+        spread by `jitter` of it; with no ttl, like `RateGraph`'s, `interval` is required. The first
+        refresh is awaited here, so the snapshot is warm once this returns. It stops on
+        `stop_refresher`, or when the client is closed.
+        """
+        if self._refresher is not None:
+            return
+        interval = self.cache.ttl * 0.8 if interval is None else interval
+        if interval <= 0:
+            raise ValueError(f"refresh interval must be positive, got {interval}")
+        await self.refresh()
+        self._refresher = asyncio.ensure_future(self._refresh_forever(interval, jitter))
+        self.client.on_close(self.stop_refresher)
+
+    async def stop_refresher(self) -> None:
+        refresher, self._refresher = self._refresher, None
+        if refresher is None:
+            return
+        refresher.cancel()
+        try:
+            await refresher
+        except asyncio.CancelledError:
+            pass
+
+    async def _refresh_forever(self, interval: float, jitter: float) -> None:
+        while True:
+            await asyncio.sleep(interval * random.uniform(1 - jitter, 1 + jitter))
+            await self.refresh()
+
+    async def exchange(self, from_: DiscriminatedCurrency, to: type[ToCurrency]) -> ToCurrency:
+        rate = await self.get_rate(type(from_), to)
+        return exchange(from_, to, rate)
+
+    async def exchange_many(
+        self, amounts: Iterable[DiscriminatedCurrency], to: type[ToCurrency]
+    ) -> list[ToCurrency]:
+        """Convert all `amounts` to `to`, keeping their order.
+        Each source currency's rate is fetched once, amounts already in `to` are kept as they are.
+        Since both the amounts and the rates are already validated, results are built without
+        validating them again.
+        """
+        amounts = list(amounts)
+        sources = [source for source in dict.fromkeys(map(type, amounts)) if source is not to]
+        rates = await asyncio.gather(*(self.get_rate(source, to) for source in sources))
+        rate_of: dict[type[DiscriminatedCurrency], Decimal] = dict(zip(sources, rates))
+        rate_of[to] = Decimal(1)
+        to_type: SUPPORTED_CTS = to.__annotations__["c_type"].__args__[0]
+        trusted = to._trusted
+        return [trusted(to_type, amount.val * rate_of[type(amount)]) for amount in amounts]
+
+    def exchange_at(
+        self,
+        amounts_with_timestamps: Iterable[tuple[DiscriminatedCurrency, datetime]],
+        to: type[ToCurrency],
+    ) -> list[ToCurrency]:
+        """Convert each amount at the rate that was in effect at its timestamp, keeping their order.
+        Rates come from `history` only, nothing is fetched; `RateNotAvailable` is raised if an
+        amount is older than the first rate recorded for its pair.
+        """
+        if self.history is None:
+            raise RateNotAvailable(f"{self.__class__.__name__} has no rate history")
+
+        to_type: SUPPORTED_CTS = to.__annotations__["c_type"].__args__[0]
+        trusted = to._trusted
+        series_of: dict[type[DiscriminatedCurrency], RateSeries] = {}
+        results: list[ToCurrency] = []
+        for amount, at in amounts_with_timestamps:
+            source = type(amount)
+            if source is to:
+                results.append(trusted(to_type, amount.val))
+                continue
+            series = series_of.get(source)
+            if series is None:
+                pair = FromToExchange(from_=source, to=to)
+                if pair not in self.mapping:
+                    raise ConverterNotMapped(
+                        f"Unsupported conversion from {source} to {to} by {self.__class__.__name__}"
+                    )
+                series = series_of[source] = self.history.series(pair)
+            rate = series.at(to_unit_ms(at))
+            if rate is None:
+                raise RateNotAvailable(f"No rate of {source} to {to} is known at {at}")
+            results.append(trusted(to_type, amount.val * rate))
+        return results
+
     @abstractmethod
-    async def exchange(self, _from: DiscriminatedCurrency, to: type[ToCurrency]) -> ToCurrency: ...
+    async def fetch_rate(self, pair: FromToExchange) -> Decimal:
+        """Fetch the current rate of `pair` from upstream, this is never cached"""
@@ -0,0 +1,92 @@
+import time
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Callable, NamedTuple, Union
+
+from .. import metrics
+from .mappings import FromToExchange
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    stale: int
+    evictions: int
+    size: int
+
+
+class RateCache:
+    """An in-memory LRU cache of exchange rates, keyed by `FromToExchange`.
+    A rate is fresh for `ttl` seconds after it was set, after that it's reported as stale and the
+    converter has to fetch it again. When more than `maxsize` pairs are cached, the least recently
+    used pair is evicted.
+    Lookups are reported to `fastexchange.metrics` labelled with `name`.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 60,
+        maxsize: int = 128,
+        timer: Callable[[], float] = time.monotonic,
+        name: str = "rate",
+    ) -> None:
+        self.ttl = ttl
+        self.name = name
+        self.maxsize = maxsize
+        self._timer = timer
+        self._rates: "OrderedDict[FromToExchange, tuple[Decimal, float]]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._stale = 0
+        self._evictions = 0
+
+    def get(self, pair: FromToExchange) -> Union[Decimal, None]:
+        """Return the cached rate of `pair`, or None if it's missing or expired"""
+        entry = self._rates.get(pair)
+        if entry is None:
+            self._misses += 1
+            if metrics.recorder is not None:
+                metrics.recorder("cache.miss", self.name, 1)
+            return None
+
+        rate, expires_at = entry
+        if self._timer() >= expires_at:
+            self._stale += 1
+            if metrics.recorder is not None:
+                metrics.recorder("cache.stale", self.name, 1)
+            return None
+
+        self._rates.move_to_end(pair)
+        self._hits += 1
+        if metrics.recorder is not None:
+            metrics.recorder("cache.hit", self.name, 1)
+        return rate
+
+    def set(self, pair: FromToExchange, rate: Decimal) -> None:
+        self._rates[pair] = (rate, self._timer() + self.ttl)
+        self._rates.move_to_end(pair)
+        while len(self._rates) > self.maxsize:
+            self._rates.popitem(last=False)
+            self._evictions += 1
+
+    def invalidate(self, pair: FromToExchange) -> None:
+        self._rates.pop(pair, None)
+
+    def clear(self) -> None:
+        self._rates.clear()
+
+    @property
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            hits=self._hits,
+            misses=self._misses,
+            stale=self._stale,
+            evictions=self._evictions,
+            size=len(self._rates),
+        )
+
+    def __len__(self) -> int:
+        return len(self._rates)
+
+    def __contains__(self, pair: FromToExchange) -> bool:
+        return pair in self._rates
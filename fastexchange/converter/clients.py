@@ -1,23 +1,47 @@
+import re
 from decimal import Decimal
+from typing import Union
 
-from lxml import html
-
-from fastexchange.currency import SUPPORTED_CTS
-from fastexchange.exceptions import ConverterNotMapped
+from fastexchange import metrics
 from fastexchange.http import validate_response
 
-from .base_client import BaseConverter, DiscriminatedCurrency, ToCurrency
+from .base_client import BaseConverter, exchange
 from .mappings import (
     EURToUSD,
     FromToExchange,
     USDToEur,
 )
 
+__all__ = ["CurrencyMeUkClient", "AnswerScanner", "exchange"]
+
+
+class AnswerScanner:
+    """Finds the value of `<input id="answer">` in an HTML document fed chunk by chunk.
+    It only looks at `<input>` tags, so no DOM is built, and the caller can stop reading as soon
+    as the value is found. A tag cut in half by a chunk boundary is kept until its next chunk.
+    """
+
+    input_tag = re.compile(rb"<input\b[^>]*>", re.IGNORECASE)
+    # attributes follow whitespace, `\b` would also match the end of `data-id` or `data-value`
+    answer_id = re.compile(rb"""\sid\s*=\s*["']?answer(?:["'\s/>]|$)""", re.IGNORECASE)
+    value_attr = re.compile(rb"""\svalue\s*=\s*["']?([^"'\s>]*)""", re.IGNORECASE)
 
-def exchange(from_: DiscriminatedCurrency, to: type[ToCurrency], rate: Decimal) -> ToCurrency:
-    to_type: SUPPORTED_CTS = to.__annotations__["c_type"].__args__[0]
-    result = from_.convert_to(to_type, rate)
-    return result  # type: ignore
+    def __init__(self) -> None:
+        self._pending = b""
+
+    def feed(self, chunk: bytes) -> Union[str, None]:
+        buffer = self._pending + chunk
+        end = 0
+        for match in self.input_tag.finditer(buffer):
+            end = match.end()
+            tag = match.group()
+            if self.answer_id.search(tag):
+                value = self.value_attr.search(tag)
+                if value is not None:
+                    return value.group(1).decode()
+        tag_start = buffer.rfind(b"<", end)
+        self._pending = buffer[tag_start:] if tag_start != -1 else b""
+        return None
 
 
 class CurrencyMeUkClient(BaseConverter):
@@ -27,16 +51,32 @@ class CurrencyMeUkClient(BaseConverter):
     }
     base_url = "https://www.currency.me.uk/convert"
 
-    async def exchange(self, from_: DiscriminatedCurrency, to: type[ToCurrency]) -> ToCurrency:
-        query_str = self.mapping.get(FromToExchange(from_=type(from_), to=to), None)
-        if query_str is None:
-            raise ConverterNotMapped(
-                f"Unsupported conversion from {type(from_)} to {to} by {self.__class__.__name__}"
-            )
-        resp = await self.client.get(f"{self.base_url}{query_str}")
-        with validate_response(resp, 200):
-            tree = html.fromstring(resp.content)
-            exchange_ratios = tree.xpath('//input[@id="answer"]/@value')
-            assert len(exchange_ratios) > 0
-            exchange_rate = Decimal(exchange_ratios[0])
-        return exchange(from_, to, exchange_rate)
+    async def fetch_rate(self, pair: FromToExchange) -> Decimal:
+        # stream the page and stop reading once the answer shows up, instead of parsing all of it
+        parsing = metrics.Stopwatch("converter.parse", type(self).__name__)
+        try:
+            async with self.client.stream("GET", f"{self.base_url}{self.mapping[pair]}") as resp:
+                with validate_response(resp, 200):
+                    scanner = AnswerScanner()
+                    chunks: list[bytes] = []
+                    async for chunk in resp.aiter_bytes():
+                        with parsing:
+                            answer = scanner.feed(chunk)
+                        if answer is not None:
+                            return Decimal(answer)
+                        chunks.append(chunk)
+                    # markup the scanner doesn't understand, fall back to a real parser
+                    with parsing:
+                        exchange_rate = Decimal(parse_answer(b"".join(chunks)))
+        finally:
+            parsing.report()
+        return exchange_rate
+
+
+def parse_answer(content: bytes) -> str:
+    from lxml import html
+
+    tree = html.fromstring(content)
+    exchange_ratios = tree.xpath('//input[@id="answer"]/@value')
+    assert len(exchange_ratios) > 0
+    return exchange_ratios[0]
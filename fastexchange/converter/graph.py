@@ -0,0 +1,101 @@
+import asyncio
+import heapq
+from decimal import Decimal
+from itertools import count
+from typing import NamedTuple, Sequence, Union
+
+from fastexchange.http import BaseClient
+
+from ..currency import DiscriminatedCurrency
+from .base_client import BaseConverter
+from .cache import RateCache
+from .history import RateHistory
+from .mappings import FromToExchange
+
+INVERTED_COST = 1.01
+"""Cost of using a pair backwards, a little more than a direct hop so direct pairs win ties"""
+
+
+class Hop(NamedTuple):
+    converter: BaseConverter
+    pair: FromToExchange
+    """Pair as the converter maps it"""
+    inverted: bool
+    """Whether the hop goes against `pair`, so its rate is `1 / rate`"""
+
+
+class RateGraph(BaseConverter):
+    """A converter that routes a conversion through the pairs other converters know.
+    Every pair of every converter is an edge of a graph of currencies, usable both ways, so a
+    conversion nobody maps directly can be triangulated, for instance X -> USD -> EUR. Routes take
+    the fewest hops and are resolved once per pair, then each hop's rate is read through its own
+    converter, from its cache while that's fresh. That way each currency only needs to be mapped
+    to one other currency, instead of to every other currency.
+    Routing is by hop count only, preferring hops in their mapped direction on ties: how fresh a
+    hop's cached rate is, or what its provider charges, doesn't change the route.
+    By default the graph doesn't cache the combined rate itself, since the hops are cached.
+    """
+
+    def __init__(
+        self,
+        converters: Sequence[BaseConverter],
+        client: Union[BaseClient, None] = None,
+        cache: Union[RateCache, None] = None,
+        history: Union[RateHistory, None] = None,
+    ):
+        super().__init__(
+            client=client, cache=cache if cache is not None else RateCache(ttl=0), history=history
+        )
+        self.converters = list(converters)
+        self._edges: dict[type[DiscriminatedCurrency], list[Hop]] = {}
+        for converter in self.converters:
+            for pair in converter.mapping:
+                self._edges.setdefault(pair.from_, []).append(Hop(converter, pair, False))
+                self._edges.setdefault(pair.to, []).append(Hop(converter, pair, True))
+        self._routes: dict[FromToExchange, Union[list[Hop], None]] = {}
+        self.mapping = {}
+        for from_ in self._edges:
+            for to in self._edges:
+                pair = FromToExchange(from_=from_, to=to)
+                route = None if from_ is to else self.route(pair)
+                if route is not None:
+                    nodes = [hop.pair.from_ if hop.inverted else hop.pair.to for hop in route]
+                    self.mapping[pair] = "->".join(node.__name__ for node in [from_, *nodes])
+
+    def route(self, pair: FromToExchange) -> Union[list[Hop], None]:
+        """Shortest chain of hops from `pair.from_` to `pair.to`, or None if there's none"""
+        if pair not in self._routes:
+            self._routes[pair] = self._find_route(pair)
+        return self._routes[pair]
+
+    async def fetch_rate(self, pair: FromToExchange) -> Decimal:
+        route = self.route(pair)
+        assert route is not None
+        rates = await asyncio.gather(
+            *(hop.converter.get_rate(hop.pair.from_, hop.pair.to) for hop in route)
+        )
+        rate = Decimal(1)
+        for hop, hop_rate in zip(route, rates):
+            rate = rate / hop_rate if hop.inverted else rate * hop_rate
+        return rate
+
+    def _find_route(self, pair: FromToExchange) -> Union[list[Hop], None]:
+        # dijkstra, the counter breaks ties since currency types can't be compared
+        tie = count()
+        queue: list[tuple[float, int, type[DiscriminatedCurrency], list[Hop]]] = [
+            (0, next(tie), pair.from_, [])
+        ]
+        visited: set[type[DiscriminatedCurrency]] = set()
+        while queue:
+            cost, _, node, hops = heapq.heappop(queue)
+            if node is pair.to:
+                return hops
+            if node in visited:
+                continue
+            visited.add(node)
+            for hop in self._edges.get(node, []):
+                target = hop.pair.from_ if hop.inverted else hop.pair.to
+                if target not in visited:
+                    hop_cost = INVERTED_COST if hop.inverted else 1
+                    heapq.heappush(queue, (cost + hop_cost, next(tie), target, [*hops, hop]))
+        return None
@@ -0,0 +1,99 @@
+import asyncio
+import time
+from decimal import Decimal
+from typing import Sequence, Union
+
+from fastexchange.http import BaseClient
+
+from .base_client import BaseConverter
+from .cache import RateCache
+from .history import RateHistory
+from .mappings import FromToExchange
+
+
+class HedgedConverter(BaseConverter):
+    """A converter that asks several converters for the same rate, and takes the first valid one.
+    Providers are tried fastest first, ranked by their observed latency. If the current provider
+    hasn't answered within `hedge_after` seconds, the next one is asked too, and a failing provider
+    is immediately replaced by the next one, so one slow or broken upstream doesn't stall us.
+    A failure counts as `failure_penalty` extra seconds of latency, which pushes that provider
+    down the ranking.
+    """
+
+    def __init__(
+        self,
+        providers: Sequence[BaseConverter],
+        hedge_after: float = 0.5,
+        failure_penalty: float = 10,
+        client: Union[BaseClient, None] = None,
+        cache: Union[RateCache, None] = None,
+        history: Union[RateHistory, None] = None,
+    ):
+        super().__init__(client=client, cache=cache, history=history)
+        self.providers = list(providers)
+        self.hedge_after = hedge_after
+        self.failure_penalty = failure_penalty
+        self.mapping = {
+            pair: provider.__class__.__name__
+            for provider in reversed(self.providers)
+            for pair in provider.mapping
+        }
+        self._latency: dict[BaseConverter, float] = {}
+        """Moving average of each provider's latency, in seconds"""
+
+    def ranked(self, pair: FromToExchange) -> list[BaseConverter]:
+        """Providers supporting `pair`, fastest first; unmeasured ones are tried before the rest"""
+        providers = [provider for provider in self.providers if pair in provider.mapping]
+        return sorted(providers, key=lambda provider: self._latency.get(provider, 0))
+
+    async def fetch_rate(self, pair: FromToExchange) -> Decimal:
+        remaining = iter(self.ranked(pair))
+        running: dict[asyncio.Task[Decimal], tuple[BaseConverter, float]] = {}
+        error: Union[BaseException, None] = None
+        winner_latency: Union[float, None] = None
+
+        def launch() -> None:
+            provider = next(remaining, None)
+            if provider is not None:
+                task = asyncio.ensure_future(provider.fetch_rate(pair))
+                running[task] = (provider, time.perf_counter())
+
+        launch()
+        try:
+            while running:
+                done, _ = await asyncio.wait(
+                    running, timeout=self.hedge_after, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    launch()
+                    continue
+                for task in done:
+                    provider, started = running.pop(task)
+                    elapsed = time.perf_counter() - started
+                    error = task.exception()
+                    if error is None and task.result() > 0:
+                        self._observe(provider, elapsed)
+                        winner_latency = elapsed
+                        return task.result()
+                    if error is None:
+                        error = ValueError(f"{provider.__class__.__name__} gave {task.result()}")
+                    self._observe(provider, elapsed + self.failure_penalty)
+                    launch()
+        finally:
+            # providers still running lost the race, so they're at least as slow as the winner;
+            # without a winner (we were cancelled) their cut short times say nothing
+            for task, (provider, started) in running.items():
+                task.cancel()
+                if winner_latency is not None:
+                    elapsed = time.perf_counter() - started
+                    self._observe(provider, max(elapsed, winner_latency))
+
+        assert error is not None
+        raise error
+
+    def _observe(self, provider: BaseConverter, latency: float, weight: float = 0.3) -> None:
+        previous = self._latency.get(provider)
+        if previous is None:
+            self._latency[provider] = latency
+        else:
+            self._latency[provider] = previous + weight * (latency - previous)
@@ -0,0 +1,111 @@
+import sqlite3
+import threading
+from bisect import bisect_right
+from datetime import datetime
+from decimal import Decimal
+from os import PathLike
+from typing import Union
+
+from fastexchange.exceptions import RateNotAvailable
+from fastexchange.utils import from_unit_ms, to_unit_ms
+
+from .mappings import FromToExchange
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rates (
+    pair TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    rate TEXT NOT NULL,
+    PRIMARY KEY (pair, ts)
+);
+"""
+
+
+def pair_key(pair: FromToExchange) -> str:
+    return f"{pair.from_.__name__}/{pair.to.__name__}"
+
+
+class RateSeries:
+    """Rates of one pair sorted by time, as two parallel lists so lookups can bisect"""
+
+    __slots__ = ("timestamps", "rates")
+
+    def __init__(self) -> None:
+        self.timestamps: list[int] = []
+        """Unix time in milliseconds"""
+        self.rates: list[Decimal] = []
+
+    def add(self, ts: int, rate: Decimal) -> None:
+        index = bisect_right(self.timestamps, ts)
+        if index and self.timestamps[index - 1] == ts:
+            self.rates[index - 1] = rate
+            return
+        self.timestamps.insert(index, ts)
+        self.rates.insert(index, rate)
+
+    def at(self, ts: int) -> Union[Decimal, None]:
+        """The rate in effect at `ts`, the last one recorded at or before it"""
+        index = bisect_right(self.timestamps, ts)
+        return self.rates[index - 1] if index else None
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+
+class RateHistory:
+    """Every rate a converter has seen, per `FromToExchange` pair, to value things in the past.
+    Rates are kept sorted by time in memory, so "rate at time t" is a binary search. Pass a `path`
+    to persist them in a local SQLite database, a pair's rates are loaded on its first lookup.
+    Times are naive local datetimes, like `TokenTransfer.block_ts`.
+    Converters on different event loops, and so threads, may share one history; recording and
+    loading take its lock.
+    """
+
+    def __init__(self, path: Union[str, "PathLike[str]"] = ":memory:") -> None:
+        # shared between threads, `_lock` lets one of them at a time use the connection
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._db.executescript(SCHEMA)
+        self._series: dict[FromToExchange, RateSeries] = {}
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def record(self, pair: FromToExchange, rate: Decimal, at: Union[datetime, None] = None) -> None:
+        ts = to_unit_ms(at or datetime.now())
+        series = self.series(pair)
+        with self._lock, self._db:
+            series.add(ts, rate)
+            self._db.execute(
+                "INSERT OR REPLACE INTO rates VALUES (?, ?, ?)", (pair_key(pair), ts, str(rate))
+            )
+
+    def rate_at(self, pair: FromToExchange, at: datetime) -> Decimal:
+        rate = self.series(pair).at(to_unit_ms(at))
+        if rate is None:
+            raise RateNotAvailable(f"No rate of {pair_key(pair)} is known at {at}")
+        return rate
+
+    def first_recorded(self, pair: FromToExchange) -> Union[datetime, None]:
+        series = self.series(pair)
+        return from_unit_ms(series.timestamps[0]) if series else None
+
+    def series(self, pair: FromToExchange) -> RateSeries:
+        series = self._series.get(pair)
+        if series is not None:
+            return series
+        with self._lock:
+            # another thread may have loaded it meanwhile
+            series = self._series.get(pair)
+            if series is None:
+                series = RateSeries()
+                rows = self._db.execute(
+                    "SELECT ts, rate FROM rates WHERE pair = ? ORDER BY ts", (pair_key(pair),)
+                )
+                for ts, rate in rows:
+                    series.timestamps.append(ts)
+                    series.rates.append(Decimal(rate))
+                # only published once complete, so readers never see a half loaded series
+                self._series[pair] = series
+        return series
@@ -0,0 +1,243 @@
+import heapq
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+from datetime import datetime
+from enum import auto
+from itertools import chain, count
+from typing import Iterable, NamedTuple, Union
+
+from fastexchange.utils import StrEnum, to_unit_ms
+
+from .schema import TokenTransfer, TransferSummary
+from .types import USDT_TRC20_CONTRACT
+
+AnyTransfer = Union[TokenTransfer, TransferSummary]
+
+
+class PaymentStatus(StrEnum):
+    PAID = auto()
+    """Paid in full, within the tolerance"""
+    PARTIAL = auto()
+    """Some of the amount is still due, the invoice stays open"""
+    OVERPAID = auto()
+    """Paid more than the amount plus the tolerance"""
+
+
+class Invoice:
+    """An amount of `quant` token units expected at `address` between `opens_at` and `expires_at`"""
+
+    __slots__ = (
+        "invoice_id",
+        "address",
+        "quant",
+        "paid",
+        "opens_at",
+        "expires_at",
+        "seq",
+        "transfers",
+    )
+
+    def __init__(
+        self, invoice_id: str, address: str, quant: int, opens_at: int, expires_at: int, seq: int
+    ) -> None:
+        self.invoice_id = invoice_id
+        self.address = address
+        self.quant = quant
+        self.paid = 0
+        self.opens_at = opens_at
+        """Unix time in milliseconds"""
+        self.expires_at = expires_at
+        """Unix time in milliseconds"""
+        self.seq = seq
+        """Creation order, older invoices win ties"""
+        self.transfers: list[str] = []
+        """Ids of the transfers paid into it"""
+
+    @property
+    def remaining(self) -> int:
+        return self.quant - self.paid
+
+    def __repr__(self) -> str:
+        return f"Invoice({self.invoice_id!r}, paid={self.paid}/{self.quant})"
+
+
+class Payment(NamedTuple):
+    invoice: Invoice
+    transfer: AnyTransfer
+    status: PaymentStatus
+
+
+class MatchResult(NamedTuple):
+    payments: list[Payment]
+    unmatched: list[AnyTransfer]
+
+
+class PaymentMatcher:
+    """Matches incoming transfers to open invoices.
+    Open invoices are indexed by `(address, remaining amount)` for exact matches, and per address
+    sorted by remaining amount, so a transfer within `tolerance` units of an amount is found by
+    binary search; matching costs about the same per transfer however many invoices are open.
+    A transfer with no amount close enough is a partial payment or an overpayment of its
+    address's only open invoice. With `best_fit`, it goes to the invoice it fits best even when
+    the address has several: the smallest one it doesn't cover, or else the largest one.
+    Transfers are only matched to invoices whose window contains their `block_ts`, each one at
+    most once, and unconfirmed ones are left alone unless `confirmed_only` is False. Transfers of
+    any other token than `contract` are never matched.
+    Amounts are in token units, like `quant`.
+    Ids of applied transfers are kept while their invoice is open, and the last `history` ones
+    of closed invoices after that, so a page seen again doesn't pay anything twice.
+    """
+
+    def __init__(
+        self,
+        tolerance: int = 0,
+        confirmed_only: bool = True,
+        contract: str = USDT_TRC20_CONTRACT,
+        best_fit: bool = False,
+        history: int = 10_000,
+    ) -> None:
+        self.tolerance = tolerance
+        self.confirmed_only = confirmed_only
+        self.contract = contract
+        self.best_fit = best_fit
+        self.history = history
+        self.invoices: dict[str, Invoice] = {}
+        """Open invoices by id"""
+        self._exact: dict[tuple[str, int], list[Invoice]] = {}
+        self._by_address: dict[str, list[tuple[int, int, Invoice]]] = {}
+        """Open invoices of each address as `(remaining, seq, invoice)`, sorted"""
+        self._expiry: list[tuple[int, int, Invoice]] = []
+        self._applied: set[str] = set()
+        """Ids of the transfers paid into open invoices"""
+        self._closed: "OrderedDict[str, None]" = OrderedDict()
+        """Ids of the last `history` transfers paid into closed invoices, oldest first"""
+        self._seq = count()
+
+    def add(
+        self,
+        invoice_id: str,
+        address: str,
+        quant: int,
+        expires_at: datetime,
+        opens_at: Union[datetime, None] = None,
+    ) -> Invoice:
+        """Open an invoice, replacing any open one with the same id"""
+        self.cancel(invoice_id)
+        opened = 0 if opens_at is None else to_unit_ms(opens_at)
+        invoice = Invoice(
+            invoice_id, address, quant, opened, to_unit_ms(expires_at), next(self._seq)
+        )
+        self.invoices[invoice_id] = invoice
+        self._index(invoice)
+        heapq.heappush(self._expiry, (invoice.expires_at, invoice.seq, invoice))
+        return invoice
+
+    def cancel(self, invoice_id: str) -> Union[Invoice, None]:
+        invoice = self.invoices.pop(invoice_id, None)
+        if invoice is not None:
+            self._unindex(invoice)
+            self._close(invoice)
+        return invoice
+
+    def expire(self, now: Union[datetime, None] = None) -> list[Invoice]:
+        """Close the invoices that expired by `now`, and return them"""
+        now_ms = to_unit_ms(now or datetime.now())
+        expired = []
+        while self._expiry and self._expiry[0][0] <= now_ms:
+            invoice = heapq.heappop(self._expiry)[2]
+            # closed invoices are left in the heap, skip them here
+            if self.invoices.get(invoice.invoice_id) is invoice:
+                del self.invoices[invoice.invoice_id]
+                self._unindex(invoice)
+                self._close(invoice)
+                expired.append(invoice)
+        return expired
+
+    def match(self, transfers: Iterable[AnyTransfer]) -> MatchResult:
+        """Apply `transfers`, e.g. a page's `token_transfers`, to the open invoices"""
+        result = MatchResult([], [])
+        for transfer in transfers:
+            tid = transfer.transaction_id
+            if tid in self._applied or tid in self._closed:
+                continue
+            if transfer.contract_address != self.contract or (
+                self.confirmed_only and not transfer.confirmed
+            ):
+                result.unmatched.append(transfer)
+                continue
+            invoice = self._find(transfer.to_address, int(transfer.quant), transfer.block_ts)
+            if invoice is None:
+                result.unmatched.append(transfer)
+                continue
+            result.payments.append(Payment(invoice, transfer, self._pay(invoice, transfer)))
+        return result
+
+    def _find(self, address: str, quant: int, at: datetime) -> Union[Invoice, None]:
+        entries = self._by_address.get(address)
+        if not entries:
+            return None
+        ts = to_unit_ms(at)
+        for invoice in self._exact.get((address, quant), ()):
+            if invoice.opens_at <= ts <= invoice.expires_at:
+                return invoice
+
+        # the closest amount within the tolerance
+        low = bisect_left(entries, (quant - self.tolerance,))
+        high = bisect_right(entries, (quant + self.tolerance + 1,))
+        close = sorted(range(low, high), key=lambda i: (abs(entries[i][0] - quant), entries[i][1]))
+        rest: Iterable[int]
+        if self.best_fit:
+            # else the smallest amount the transfer doesn't cover, then the largest one
+            rest = chain(range(high, len(entries)), range(low - 1, -1, -1))
+        elif len(entries) == 1:
+            rest = range(1)
+        else:
+            # which of several invoices an odd amount is for is anyone's guess
+            rest = range(0)
+        for i in chain(close, rest):
+            invoice = entries[i][2]
+            if invoice.opens_at <= ts <= invoice.expires_at:
+                return invoice
+        return None
+
+    def _pay(self, invoice: Invoice, transfer: AnyTransfer) -> PaymentStatus:
+        self._unindex(invoice)
+        invoice.paid += int(transfer.quant)
+        invoice.transfers.append(transfer.transaction_id)
+        self._applied.add(transfer.transaction_id)
+        if invoice.remaining > self.tolerance:
+            self._index(invoice)
+            return PaymentStatus.PARTIAL
+        del self.invoices[invoice.invoice_id]
+        self._close(invoice)
+        if invoice.remaining < -self.tolerance:
+            return PaymentStatus.OVERPAID
+        return PaymentStatus.PAID
+
+    def _close(self, invoice: Invoice) -> None:
+        for tid in invoice.transfers:
+            self._applied.discard(tid)
+            self._closed[tid] = None
+        while len(self._closed) > self.history:
+            self._closed.popitem(last=False)
+
+    def _index(self, invoice: Invoice) -> None:
+        self._exact.setdefault((invoice.address, invoice.remaining), []).append(invoice)
+        insort(
+            self._by_address.setdefault(invoice.address, []),
+            (invoice.remaining, invoice.seq, invoice),
+        )
+
+    def _unindex(self, invoice: Invoice) -> None:
+        key = (invoice.address, invoice.remaining)
+        same_amount = self._exact[key]
+        same_amount.remove(invoice)
+        if not same_amount:
+            del self._exact[key]
+        entries = self._by_address[invoice.address]
+        del entries[bisect_left(entries, (invoice.remaining, invoice.seq))]
+        if not entries:
+            del self._by_address[invoice.address]
+
+    def __len__(self) -> int:
+        return len(self.invoices)
@@ -6,15 +6,13 @@ from typing import Annotated, Union
 
 from pydantic import BaseModel, BeforeValidator, Field
 
-from fastexchange.utils import StrEnum
+from fastexchange.utils import StrEnum, from_unit_ms
 
 from ..currency import USDCurrency
+from ..minor import MinorUnits
 from .types import UsdtTrcToken
 
-UnitMsTime = Annotated[
-    datetime,
-    BeforeValidator(lambda v: datetime.fromtimestamp(v / 1000) if isinstance(v, int) else v),
-]
+UnitMsTime = Annotated[datetime, BeforeValidator(from_unit_ms)]
 
 
 class EventTypes(StrEnum):
@@ -68,7 +66,9 @@ class TokenTransfer(BaseModel):
     contractRet: Union[Status, str] = Field(union_mode="left_to_right")
 
     def to_usd(self, current_rate: Decimal = Decimal(1)) -> USDCurrency:
-        """We assume that 1 usdt == 1 usd, but in case this wasn't true, this method should get the current rate"""
+        """We assume that 1 usdt == 1 usd, but in case this wasn't true, this method should get
+        the current rate
+        """
         token = self.to_token()
         return USDCurrency(val=token.val / current_rate)
 
@@ -76,8 +76,49 @@ class TokenTransfer(BaseModel):
         val = self.quant / 1000000
         return UsdtTrcToken(val=val)
 
+    def to_minor(self) -> MinorUnits[UsdtTrcToken]:
+        """The amount in USDT minor units, that's `quant` itself, no rounding involved"""
+        return MinorUnits(UsdtTrcToken, int(self.quant))
+
 
 class Transfers(BaseModel):
     total: int
     rangeTotal: int
     token_transfers: list[TokenTransfer]
+
+
+class TransferSummary(BaseModel):
+    """A lean projection of `TokenTransfer`, keeping only the fields needed to track payments.
+    It validates much less than `TokenTransfer`, which makes parsing large pages cheaper.
+    """
+
+    transaction_id: str
+    from_address: str
+    to_address: str
+    contract_address: str
+    quant: int
+    """Amount in the token's smallest unit"""
+    block: int
+    block_ts: UnitMsTime
+    confirmed: bool
+
+    def to_usd(self, current_rate: Decimal = Decimal(1)) -> USDCurrency:
+        """We assume that 1 usdt == 1 usd, but in case this wasn't true, this method should get
+        the current rate
+        """
+        token = self.to_token()
+        return USDCurrency(val=token.val / current_rate)
+
+    def to_token(self) -> UsdtTrcToken:
+        val = Decimal(self.quant) / 1000000
+        return UsdtTrcToken(val=val)
+
+    def to_minor(self) -> MinorUnits[UsdtTrcToken]:
+        """The amount in USDT minor units, that's `quant` itself"""
+        return MinorUnits(UsdtTrcToken, self.quant)
+
+
+class TransferSummaries(BaseModel):
+    total: int
+    rangeTotal: int
+    token_transfers: list[TransferSummary]
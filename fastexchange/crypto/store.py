@@ -0,0 +1,115 @@
+import sqlite3
+import threading
+from datetime import datetime
+from os import PathLike
+from typing import Iterable, NamedTuple, Union
+
+from fastexchange.utils import from_unit_ms, to_unit_ms
+
+from .schema import TokenTransfer
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transfers (
+    wallet TEXT NOT NULL,
+    transaction_id TEXT NOT NULL,
+    block INTEGER NOT NULL,
+    block_ts INTEGER NOT NULL,
+    confirmed INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (wallet, transaction_id)
+);
+CREATE INDEX IF NOT EXISTS transfers_unconfirmed ON transfers (wallet, confirmed, block_ts);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    wallet TEXT PRIMARY KEY,
+    block INTEGER NOT NULL,
+    block_ts INTEGER NOT NULL
+);
+"""
+
+
+class Checkpoint(NamedTuple):
+    block: int
+    block_ts: datetime
+
+
+class TransferStore:
+    """A local SQLite store of each wallet's transfers, keyed by transaction id.
+    Alongside the transfers, it keeps a checkpoint per wallet; the newest block that was fully
+    synced, so `Trc20Gateway.sync` only has to fetch what came after it.
+    Confirmed transfers are immutable and never rewritten, unconfirmed ones are updated until
+    they're confirmed.
+    It can be shared between threads, e.g. read by callers while `SyncTrc20Gateway.sync` writes
+    to it from the background loop's thread; each call holds the store's lock.
+    """
+
+    def __init__(self, path: Union[str, "PathLike[str]"] = ":memory:") -> None:
+        # any thread may call in, `_lock` keeps them to one at a time on the connection
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def get(self, wallet: str, transaction_id: str) -> Union[TokenTransfer, None]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT data FROM transfers WHERE wallet = ? AND transaction_id = ?",
+                (wallet, transaction_id),
+            ).fetchone()
+        return None if row is None else TokenTransfer.model_validate_json(row[0])
+
+    def transfers(self, wallet: str) -> list[TokenTransfer]:
+        """Every stored transfer of `wallet`, newest first"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT data FROM transfers WHERE wallet = ? ORDER BY block_ts DESC", (wallet,)
+            ).fetchall()
+        return [TokenTransfer.model_validate_json(data) for (data,) in rows]
+
+    def save(self, wallet: str, transfers: Iterable[TokenTransfer]) -> list[TokenTransfer]:
+        """Store `transfers`, returning those that were new or got confirmed"""
+        changed: list[TokenTransfer] = []
+        with self._lock, self._db:
+            for transfer in transfers:
+                row = self._db.execute(
+                    "SELECT confirmed FROM transfers WHERE wallet = ? AND transaction_id = ?",
+                    (wallet, transfer.transaction_id),
+                ).fetchone()
+                if row is not None and (row[0] or not transfer.confirmed):
+                    continue
+                self._db.execute(
+                    "INSERT OR REPLACE INTO transfers VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        wallet,
+                        transfer.transaction_id,
+                        transfer.block,
+                        to_unit_ms(transfer.block_ts),
+                        transfer.confirmed,
+                        transfer.model_dump_json(),
+                    ),
+                )
+                changed.append(transfer)
+        return changed
+
+    def checkpoint(self, wallet: str) -> Union[Checkpoint, None]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT block, block_ts FROM checkpoints WHERE wallet = ?", (wallet,)
+            ).fetchone()
+        return None if row is None else Checkpoint(block=row[0], block_ts=from_unit_ms(row[1]))
+
+    def set_checkpoint(self, wallet: str, checkpoint: Checkpoint) -> None:
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?)",
+                (wallet, checkpoint.block, to_unit_ms(checkpoint.block_ts)),
+            )
+
+    def oldest_unconfirmed(self, wallet: str) -> Union[datetime, None]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT MIN(block_ts) FROM transfers WHERE wallet = ? AND confirmed = 0", (wallet,)
+            ).fetchone()
+        return None if row[0] is None else from_unit_ms(row[0])
@@ -0,0 +1,211 @@
+from array import array
+from datetime import datetime, timedelta
+from decimal import Decimal
+from itertools import compress
+from typing import Iterable, Literal, Union
+
+from fastexchange.utils import from_unit_ms, to_unit_ms
+
+from ..batch import CurrencyBatch, round_div
+from ..currency import CurrencyEnum
+from ..minor import MinorUnits
+from .schema import TokenTransfer, Transfers, TransferSummaries, TransferSummary
+from .types import USDT_TRC20_CONTRACT, UsdtTrcToken
+
+QUANT_SCALE = 6
+"""Decimal places of `quant`, it's an integer number of 1e-6 USDT"""
+
+QUANT_MAX = 2**63 - 1
+"""Largest `quant` a row can hold"""
+
+
+class TransferTable:
+    """Transfers stored column by column, for aggregating over long histories.
+    Numbers live in compact arrays (`block_ts` in unix milliseconds, `quant` in token units) and
+    addresses are interned, so each row only costs a few machine integers plus its transaction id.
+    Transfers of any token can be stored, but the amounts (`total`, `sum_by_period`, `to_usd`...)
+    only count USDT ones; `select(contract=...)` picks the rows of another token.
+    """
+
+    __slots__ = (
+        "transaction_ids",
+        "block",
+        "block_ts",
+        "quant",
+        "confirmed",
+        "from_address",
+        "to_address",
+        "contract",
+        "addresses",
+        "_address_codes",
+    )
+
+    def __init__(self) -> None:
+        self.transaction_ids: list[str] = []
+        self.block = array("q")
+        self.block_ts = array("q")
+        self.quant = array("q")
+        self.confirmed = array("b")
+        self.from_address = array("l")
+        """Index of each row's sender in `addresses`"""
+        self.to_address = array("l")
+        """Index of each row's receiver in `addresses`"""
+        self.contract = array("l")
+        """Index of each row's token contract in `addresses`"""
+        self.addresses: list[str] = []
+        self._address_codes: dict[str, int] = {}
+
+    @classmethod
+    def from_transfers(
+        cls, transfers: Iterable[Union[TokenTransfer, TransferSummary]]
+    ) -> "TransferTable":
+        table = cls()
+        table.extend(transfers)
+        return table
+
+    @classmethod
+    def from_page(cls, page: Union[Transfers, TransferSummaries]) -> "TransferTable":
+        return cls.from_transfers(page.token_transfers)
+
+    def extend(self, transfers: Iterable[Union[TokenTransfer, TransferSummary]]) -> None:
+        intern = self._intern
+        for transfer in transfers:
+            quant = int(transfer.quant)
+            if not -QUANT_MAX <= quant <= QUANT_MAX:
+                # tokens with 18 decimals get there, check before any column is appended to
+                raise ValueError(f"quant of {transfer.transaction_id} doesn't fit in 64 bits")
+            self.transaction_ids.append(transfer.transaction_id)
+            self.block.append(transfer.block)
+            self.block_ts.append(to_unit_ms(transfer.block_ts))
+            self.quant.append(quant)
+            self.confirmed.append(transfer.confirmed)
+            self.from_address.append(intern(transfer.from_address))
+            self.to_address.append(intern(transfer.to_address))
+            self.contract.append(intern(transfer.contract_address))
+
+    def __len__(self) -> int:
+        return len(self.transaction_ids)
+
+    def filter(self, mask: Iterable[bool]) -> "TransferTable":
+        """Rows where `mask` is true, the address dictionary is shared with this table"""
+        mask = list(mask)
+        table = self.__class__()
+        table.transaction_ids = list(compress(self.transaction_ids, mask))
+        for name in (
+            "block",
+            "block_ts",
+            "quant",
+            "confirmed",
+            "from_address",
+            "to_address",
+            "contract",
+        ):
+            column = getattr(self, name)
+            setattr(table, name, array(column.typecode, compress(column, mask)))
+        table.addresses = self.addresses
+        table._address_codes = self._address_codes
+        return table
+
+    def select(
+        self,
+        *,
+        from_address: Union[str, None] = None,
+        to_address: Union[str, None] = None,
+        contract: Union[str, None] = None,
+        confirmed: Union[bool, None] = None,
+        since: Union[datetime, None] = None,
+        until: Union[datetime, None] = None,
+    ) -> "TransferTable":
+        """Rows matching every given condition, `since` is inclusive and `until` is exclusive"""
+        mask = [True] * len(self)
+        if from_address is not None:
+            code = self._address_codes.get(from_address, -1)
+            mask = [m and c == code for m, c in zip(mask, self.from_address)]
+        if to_address is not None:
+            code = self._address_codes.get(to_address, -1)
+            mask = [m and c == code for m, c in zip(mask, self.to_address)]
+        if contract is not None:
+            code = self._address_codes.get(contract, -1)
+            mask = [m and c == code for m, c in zip(mask, self.contract)]
+        if confirmed is not None:
+            mask = [m and c == confirmed for m, c in zip(mask, self.confirmed)]
+        if since is not None:
+            since_ms = to_unit_ms(since)
+            mask = [m and ts >= since_ms for m, ts in zip(mask, self.block_ts)]
+        if until is not None:
+            until_ms = to_unit_ms(until)
+            mask = [m and ts < until_ms for m, ts in zip(mask, self.block_ts)]
+        return self.filter(mask)
+
+    def total(self) -> UsdtTrcToken:
+        return UsdtTrcToken(val=_to_value(sum(self._usdt().quant)))
+
+    def received_by_address(self) -> dict[str, UsdtTrcToken]:
+        """Total amount received by each address"""
+        usdt = self._usdt()
+        return usdt._sum_by(usdt.to_address)
+
+    def sent_by_address(self) -> dict[str, UsdtTrcToken]:
+        """Total amount sent by each address"""
+        usdt = self._usdt()
+        return usdt._sum_by(usdt.from_address)
+
+    def sum_by_period(self, period: timedelta = timedelta(days=1)) -> dict[datetime, UsdtTrcToken]:
+        """Total amount per time bucket of `period`, keyed by the bucket's start"""
+        period_ms = round(period.total_seconds() * 1000)
+        sums: dict[int, int] = {}
+        usdt = self._usdt()
+        for ts, quant in zip(usdt.block_ts, usdt.quant):
+            bucket = ts - ts % period_ms
+            sums[bucket] = sums.get(bucket, 0) + quant
+        return {
+            from_unit_ms(bucket): UsdtTrcToken(val=_to_value(quant))
+            for bucket, quant in sorted(sums.items())
+        }
+
+    def to_token(self) -> list[MinorUnits[UsdtTrcToken]]:
+        """The USDT column in minor units, that's each `quant` as is, nothing gets validated"""
+        return [MinorUnits(UsdtTrcToken, quant) for quant in self._usdt().quant]
+
+    def to_usd(
+        self, current_rate: Decimal = Decimal(1)
+    ) -> CurrencyBatch[Literal[CurrencyEnum.USD]]:
+        """The USDT column divided by `current_rate` (USDT per USD, 1 by default) as one
+        `CurrencyBatch`, at 6 places and rounding half to even
+        """
+        quants = self._usdt().quant
+        if current_rate == 1:
+            return CurrencyBatch(CurrencyEnum.USD, quants, QUANT_SCALE)
+        numerator, denominator = Decimal(current_rate).as_integer_ratio()
+        units = (round_div(quant * denominator, numerator) for quant in quants)
+        return CurrencyBatch(CurrencyEnum.USD, units, QUANT_SCALE)
+
+    def _usdt(self) -> "TransferTable":
+        """The USDT rows, that's usually all of them"""
+        code = self._address_codes.get(USDT_TRC20_CONTRACT, -1)
+        if self.contract.count(code) == len(self):
+            return self
+        return self.select(contract=USDT_TRC20_CONTRACT)
+
+    def _intern(self, address: str) -> int:
+        code = self._address_codes.get(address)
+        if code is None:
+            code = self._address_codes[address] = len(self.addresses)
+            self.addresses.append(address)
+        return code
+
+    def _sum_by(self, codes: array) -> dict[str, UsdtTrcToken]:
+        sums = [0] * len(self.addresses)
+        seen = [False] * len(self.addresses)
+        for code, quant in zip(codes, self.quant):
+            sums[code] += quant
+            seen[code] = True
+        return {
+            address: UsdtTrcToken(val=_to_value(total))
+            for address, total, is_seen in zip(self.addresses, sums, seen)
+            if is_seen
+        }
+
+
+def _to_value(quant: int) -> Decimal:
+    return Decimal(quant).scaleb(-QUANT_SCALE)
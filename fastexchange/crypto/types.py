@@ -1,10 +1,12 @@
 from abc import ABC
-from decimal import Decimal
+from decimal import ROUND_HALF_EVEN, Decimal
 from enum import auto
-from typing import Annotated, Literal, Union
+from typing import Annotated, ClassVar, Literal, Union
 
-from pydantic import BaseModel, Field, TypeAdapter
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
+from typing_extensions import Self
 
+from fastexchange.minor import MinorUnits
 from fastexchange.utils import StrEnum
 
 
@@ -14,16 +16,29 @@ class CryptoToken(StrEnum):
 
 
 class BaseCryptoToken(BaseModel, ABC):
+    model_config = ConfigDict(defer_build=True)
+
+    minor_scale: ClassVar[int] = 6
+    """Decimal places of the minor unit, see `MinorUnits`"""
+
     t_type: CryptoToken
     """Token Type"""
     val: Decimal
     """Token Value"""
 
+    def to_minor(self, rounding: str = ROUND_HALF_EVEN) -> "MinorUnits[Self]":
+        """This amount as an integer number of minor units, rounding at `minor_scale` places"""
+        return MinorUnits.from_model(self, rounding)
+
 
 class UsdtTrcToken(BaseCryptoToken):
     t_type: Literal[CryptoToken.USDT_TRC20] = CryptoToken.USDT_TRC20
 
 
+USDT_TRC20_CONTRACT = "TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6t"
+"""Contract address of USDT on Tron, the `contract_address` of its transfers"""
+
+
 class UsdtEthToken(BaseCryptoToken):
     t_type: Literal[CryptoToken.USDT_ETH] = CryptoToken.USDT_ETH
 
@@ -31,4 +46,4 @@ class UsdtEthToken(BaseCryptoToken):
 DiscriminatedCryptoToken = Annotated[
     Union[UsdtTrcToken, UsdtEthToken], Field(discriminator="t_type")
 ]
-AnyCryptoToken = TypeAdapter(DiscriminatedCryptoToken)
+AnyCryptoToken = TypeAdapter(DiscriminatedCryptoToken, config=ConfigDict(defer_build=True))
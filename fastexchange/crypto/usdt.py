@@ -1,18 +1,372 @@
-from typing import Union
+import asyncio
+import heapq
+import random
+from collections import deque
+from datetime import datetime
+from enum import auto
+from itertools import count
+from typing import AsyncIterator, Iterable, NamedTuple, TypeVar, Union
 
+from httpx import Response
+
+from fastexchange import metrics
 from fastexchange.http import BaseClient, get_client, validate_response
+from fastexchange.utils import StrEnum
+
+from .schema import TokenTransfer, Transfers, TransferSummaries
+from .store import Checkpoint, TransferStore
+
+PAGE_SIZE = 50
+SYNC_CHUNK_SIZE = 500
+
+Page = TypeVar("Page", Transfers, TransferSummaries)
+
+
+class WalletTransfers(NamedTuple):
+    wallet: str
+    transfers: Union[Transfers, None]
+    """None if the lookup failed"""
+    error: Union[Exception, None]
+
+
+class TransactionsResult(NamedTuple):
+    transfers: dict[str, Transfers]
+    errors: dict[str, Exception]
+
+
+class WatchEvent(StrEnum):
+    NEW = auto()
+    """A transfer seen for the first time"""
+    CONFIRMED = auto()
+    """A transfer seen unconfirmed before got confirmed"""
+    FAILED = auto()
+    """Polling the wallet failed, it's retried later"""
 
-from .schema import Transfers
+
+class TransferEvent(NamedTuple):
+    kind: WatchEvent
+    wallet: str
+    transfer: Union[TokenTransfer, None]
+    """None if the poll failed"""
+    error: Union[Exception, None] = None
+
+
+class WatchedWallet:
+    """What `Trc20Gateway.watch` knows about one wallet"""
+
+    __slots__ = ("wallet", "interval", "floor", "seen", "unconfirmed")
+
+    def __init__(self, wallet: str, interval: float) -> None:
+        self.wallet = wallet
+        self.interval = interval
+        """Seconds until the next poll"""
+        self.floor: Union[int, None] = None
+        """Transfers below this block are old news, None until the first poll"""
+        self.seen: dict[str, int] = {}
+        """Block of every transfer seen at or above `floor`, by transaction id"""
+        self.unconfirmed: dict[str, TokenTransfer] = {}
+
+    def update(self, transfer: TokenTransfer, baseline: bool) -> Union[WatchEvent, None]:
+        """Take in a polled transfer, and tell what's new about it.
+        A `baseline` transfer was there before watching started, it's only followed until it's
+        confirmed.
+        """
+        transaction_id = transfer.transaction_id
+        if transaction_id in self.unconfirmed:
+            if not transfer.confirmed:
+                return None
+            del self.unconfirmed[transaction_id]
+            return WatchEvent.CONFIRMED
+        if transaction_id in self.seen or (self.floor is not None and transfer.block < self.floor):
+            return None
+        self.seen[transaction_id] = transfer.block
+        if not transfer.confirmed:
+            self.unconfirmed[transaction_id] = transfer
+        return None if baseline else WatchEvent.NEW
+
+    def raise_floor(self, block: int) -> None:
+        self.floor = block
+        self.seen = {tid: seen_at for tid, seen_at in self.seen.items() if seen_at >= block}
 
 
 class Trc20Gateway:
     def __init__(self, client: Union[BaseClient, None] = None):
-        self.client = client or get_client()
+        self._client = client
         self.base_url = "https://apilist.tronscanapi.com/api/token_trc20"
 
+    @property
+    def client(self) -> BaseClient:
+        """The client given at init, or else the running event loop's shared one"""
+        return self._client if self._client is not None else get_client()
+
     async def check_transaction(self, wallet: str) -> Transfers:
-        resp = await self.client.get(
-            f"{self.base_url}/transfers?limit=50&start=0&sort=-timestamp&count=true&relatedAddress={wallet}",
+        return await self.fetch_page(wallet)
+
+    async def iter_check_transactions(
+        self, wallets: Iterable[str], concurrency: int = 10
+    ) -> AsyncIterator[WalletTransfers]:
+        """Check the transactions of every wallet, yielding results as they complete.
+        At most `concurrency` lookups run at a time, a failing lookup is yielded with its error
+        rather than failing the rest.
+        """
+        if concurrency < 1:
+            raise ValueError(f"concurrency must be 1 or more, got {concurrency}")
+        pending = iter(wallets)
+        results: "asyncio.Queue[Union[WalletTransfers, None]]" = asyncio.Queue()
+
+        async def worker() -> None:
+            # workers share one iterator, so each wallet is only picked once
+            for wallet in pending:
+                try:
+                    transfers = await self.check_transaction(wallet)
+                except Exception as exc:
+                    results.put_nowait(WalletTransfers(wallet, None, exc))
+                else:
+                    results.put_nowait(WalletTransfers(wallet, transfers, None))
+            results.put_nowait(None)
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(concurrency)]
+        running = len(workers)
+        try:
+            while running:
+                result = await results.get()
+                if result is None:
+                    running -= 1
+                else:
+                    yield result
+        finally:
+            for task in workers:
+                task.cancel()
+
+    async def check_transactions(
+        self, wallets: Iterable[str], concurrency: int = 10
+    ) -> TransactionsResult:
+        """Like `iter_check_transactions`, but collect the results keyed by wallet"""
+        result = TransactionsResult(transfers={}, errors={})
+        async for wallet, transfers, error in self.iter_check_transactions(wallets, concurrency):
+            if error is not None:
+                result.errors[wallet] = error
+            else:
+                result.transfers[wallet] = transfers  # type: ignore
+        return result
+
+    async def check_transaction_summary(self, wallet: str) -> TransferSummaries:
+        """Like `check_transaction`, but parse the lean `TransferSummary` projection"""
+        return await self.fetch_summary_page(wallet)
+
+    async def fetch_page(self, wallet: str, start: int = 0, limit: int = PAGE_SIZE) -> Transfers:
+        """Transfers related to `wallet`, newest first, starting at offset `start`"""
+        resp = await self._get_page(wallet, start, limit)
+        return self._validate_page(Transfers, resp)
+
+    async def fetch_summary_page(
+        self, wallet: str, start: int = 0, limit: int = PAGE_SIZE
+    ) -> TransferSummaries:
+        resp = await self._get_page(wallet, start, limit)
+        return self._validate_page(TransferSummaries, resp)
+
+    @staticmethod
+    def _validate_page(model: type[Page], resp: Response) -> Page:
+        validating = metrics.Stopwatch("transfers.validate", model.__name__)
+        with validate_response(resp, 200), validating:
+            # validate straight from the body, without building an intermediate dict
+            page = model.model_validate_json(resp.content)
+        validating.report()
+        return page
+
+    async def _get_page(self, wallet: str, start: int, limit: int) -> Response:
+        return await self.client.get(
+            f"{self.base_url}/transfers",
+            params={
+                "limit": limit,
+                "start": start,
+                "sort": "-timestamp",
+                "count": "true",
+                "relatedAddress": wallet,
+            },
         )
-        with validate_response(resp, 200):
-            return Transfers.model_validate(resp.json())
+
+    async def iter_transfers(
+        self, wallet: str, since: Union[datetime, None] = None, prefetch: int = 4
+    ) -> AsyncIterator[TokenTransfer]:
+        """Yield every transfer related to `wallet`, newest first, stopping at `since` if given.
+        While a page is consumed, up to `prefetch` next pages are fetched concurrently, so only a
+        few pages are ever held in memory no matter how long the wallet history is. With
+        `prefetch=0`, each page is only fetched once the previous one is consumed.
+        """
+        if prefetch < 0:
+            raise ValueError(f"prefetch must be 0 or more, got {prefetch}")
+        page = await self.fetch_page(wallet)
+        offsets = iter(range(PAGE_SIZE, page.rangeTotal, PAGE_SIZE))
+        pending: "deque[asyncio.Task[Transfers]]" = deque()
+        previous_ids: set[str] = set()
+
+        def schedule(size: int) -> None:
+            while len(pending) < size:
+                start = next(offsets, None)
+                if start is None:
+                    return
+                pending.append(asyncio.ensure_future(self.fetch_page(wallet, start)))
+
+        try:
+            schedule(prefetch)
+            while True:
+                for transfer in page.token_transfers:
+                    if since is not None and transfer.block_ts < since:
+                        return
+                    # new transfers shift the offsets, so a page may repeat the previous one's tail
+                    if transfer.transaction_id not in previous_ids:
+                        yield transfer
+                if not pending and page.token_transfers:
+                    # nothing prefetched, ask for the next page now
+                    schedule(1)
+                if not pending or not page.token_transfers:
+                    return
+                previous_ids = {transfer.transaction_id for transfer in page.token_transfers}
+                page = await pending.popleft()
+                schedule(prefetch)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def watch(
+        self,
+        wallets: Iterable[str],
+        since: Union[datetime, None] = None,
+        min_interval: float = 5,
+        max_interval: float = 300,
+        backoff: float = 2,
+        concurrency: int = 10,
+        max_pages: int = 10,
+    ) -> AsyncIterator[TransferEvent]:
+        """Poll `wallets` forever, yielding every new transfer once and every confirmation.
+        On a wallet's first poll, transfers older than `since` (all of them if it's None) are taken
+        as already known: they aren't yielded, though the unconfirmed ones are followed until
+        they're confirmed.
+        Each wallet is polled every `min_interval` seconds while it's active or has unconfirmed
+        transfers, and `backoff` times less often after each quiet poll, down to every
+        `max_interval` seconds. One heap orders all the wallets by when they're due, and at most
+        `concurrency` polls run at a time. A poll reads pages until it gets back to transfers it
+        has seen, and looks for older unconfirmed transfers up to `max_pages` pages deep.
+        A failing poll is yielded as a `FAILED` event, and backs the wallet off like a quiet one.
+        """
+        if concurrency < 1:
+            raise ValueError(f"concurrency must be 1 or more, got {concurrency}")
+        if min_interval <= 0:
+            raise ValueError(f"min_interval must be more than 0, got {min_interval}")
+        if max_interval < min_interval:
+            raise ValueError(f"max_interval must be min_interval or more, got {max_interval}")
+        if backoff < 1:
+            raise ValueError(f"backoff must be 1 or more, got {backoff}")
+        loop = asyncio.get_running_loop()
+        tie = count()
+        schedule = [(loop.time(), next(tie), WatchedWallet(w, min_interval)) for w in wallets]
+        polls: "dict[asyncio.Task[list[TransferEvent]], WatchedWallet]" = {}
+        try:
+            while schedule or polls:
+                now = loop.time()
+                while schedule and schedule[0][0] <= now and len(polls) < concurrency:
+                    state = heapq.heappop(schedule)[2]
+                    polls[asyncio.ensure_future(self._poll(state, since, max_pages))] = state
+                timeout = None
+                if schedule and len(polls) < concurrency:
+                    timeout = schedule[0][0] - now
+                if not polls:
+                    await asyncio.sleep(timeout or 0)
+                    continue
+
+                done, _ = await asyncio.wait(
+                    polls, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    state = polls.pop(task)
+                    try:
+                        events = task.result()
+                        active = bool(events or state.unconfirmed)
+                    except Exception as exc:
+                        events = [TransferEvent(WatchEvent.FAILED, state.wallet, None, exc)]
+                        active = False
+                    if active:
+                        state.interval = min_interval
+                    else:
+                        state.interval = min(max_interval, state.interval * backoff)
+                    # a little jitter, so wallets that went quiet together don't poll together
+                    due = loop.time() + state.interval * random.uniform(0.9, 1.1)
+                    heapq.heappush(schedule, (due, next(tie), state))
+                    for event in events:
+                        yield event
+        finally:
+            for task in polls:
+                task.cancel()
+
+    async def _poll(
+        self, state: WatchedWallet, since: Union[datetime, None], max_pages: int
+    ) -> list[TransferEvent]:
+        first = state.floor is None
+        events: list[TransferEvent] = []
+        polled: set[str] = set()
+        oldest: Union[TokenTransfer, None] = None
+        for page_number in count():
+            page = await self.fetch_page(state.wallet, page_number * PAGE_SIZE)
+            overlaps = False
+            for transfer in page.token_transfers:
+                polled.add(transfer.transaction_id)
+                overlaps = overlaps or transfer.transaction_id in state.seen
+                baseline = first and (since is None or transfer.block_ts < since)
+                kind = state.update(transfer, baseline)
+                if kind is not None:
+                    events.append(TransferEvent(kind, state.wallet, transfer))
+            if len(page.token_transfers) < PAGE_SIZE:
+                if page.token_transfers:
+                    oldest = page.token_transfers[-1]
+                break
+            oldest = page.token_transfers[-1]
+
+            if first:
+                more_new = since is not None and oldest.block_ts >= since
+            else:
+                # a page of nothing but new transfers may not reach the ones seen last time
+                more_new = not overlaps and state.floor is not None and oldest.block >= state.floor
+            more_unconfirmed = page_number + 1 < max_pages and any(
+                transfer.block < oldest.block for transfer in state.unconfirmed.values()
+            )
+            if not (more_new or more_unconfirmed):
+                break
+
+        # unconfirmed transfers that weren't polled got reverted or are too deep to follow
+        for transaction_id in [tid for tid in state.unconfirmed if tid not in polled]:
+            del state.unconfirmed[transaction_id]
+        if state.floor is None:
+            state.raise_floor(0 if oldest is None else oldest.block)
+        elif oldest is not None and oldest.block > state.floor:
+            state.raise_floor(oldest.block)
+        return events
+
+    async def sync(self, wallet: str, store: TransferStore) -> list[TokenTransfer]:
+        """Fetch what's new for `wallet` since its checkpoint in `store`, and save it there.
+        Fetching goes back to the checkpoint, or to the oldest unconfirmed transfer if that's older,
+        so those keep being rechecked until they're confirmed.
+        Returns the transfers that were new or got confirmed.
+        """
+        checkpoint = store.checkpoint(wallet)
+        since = None if checkpoint is None else checkpoint.block_ts
+        oldest_unconfirmed = store.oldest_unconfirmed(wallet)
+        if since is not None and oldest_unconfirmed is not None and oldest_unconfirmed < since:
+            since = oldest_unconfirmed
+
+        changed: list[TokenTransfer] = []
+        chunk: list[TokenTransfer] = []
+        newest = checkpoint
+        async for transfer in self.iter_transfers(wallet, since=since):
+            if newest is None or transfer.block > newest.block:
+                newest = Checkpoint(block=transfer.block, block_ts=transfer.block_ts)
+            chunk.append(transfer)
+            if len(chunk) >= SYNC_CHUNK_SIZE:
+                changed.extend(store.save(wallet, chunk))
+                chunk.clear()
+        changed.extend(store.save(wallet, chunk))
+
+        # transfers come newest first, so the checkpoint may only move once all of them are saved
+        if newest is not None and newest != checkpoint:
+            store.set_checkpoint(wallet, newest)
+        return changed
@@ -1,14 +1,15 @@
 from abc import ABC
-from decimal import Decimal
+from decimal import ROUND_HALF_EVEN, Decimal
 from enum import auto
-from typing import Annotated, Generic, Literal, TypeVar, Union
+from typing import Annotated, ClassVar, Generic, Literal, TypeVar, Union
 
-from pydantic import BaseModel, Field, TypeAdapter
-from typing_extensions import TypeAlias
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
+from typing_extensions import Self, TypeAlias
 
 from fastexchange.utils import StrEnum
 
 from .exceptions import CantCompareException
+from .minor import MinorUnits
 
 
 class CurrencyEnum(StrEnum):
@@ -21,17 +22,47 @@ SUPPORTED_CTS: TypeAlias = Literal[CurrencyEnum.EURO, CurrencyEnum.USD]
 CT = TypeVar("CT", bound=SUPPORTED_CTS)
 OtherCT = TypeVar("OtherCT", bound=SUPPORTED_CTS)
 
+# `BaseModel` keeps its state in these slots. Filling them directly is what `model_construct`
+# does minus the defaults, aliases and extra handling, which cost more than validating would;
+# tests/test_currencies.py checks the result still looks like a validated instance
+_new_object = object.__new__
+_set_dict = BaseModel.__dict__["__dict__"].__set__
+_set_fields_set = BaseModel.__dict__["__pydantic_fields_set__"].__set__
+_set_extra = BaseModel.__dict__["__pydantic_extra__"].__set__
+_set_private = BaseModel.__dict__["__pydantic_private__"].__set__
+
 
 class BaseCurrency(BaseModel, Generic[CT], ABC):
+    # subclasses build their validators on first use rather than at import
+    model_config = ConfigDict(defer_build=True)
+
+    minor_scale: ClassVar[int] = 2
+    """Decimal places of the minor unit, see `MinorUnits`"""
+
     c_type: CT
     """Currency type"""
     val: Decimal
     """Currency value"""
 
+    @classmethod
+    def _trusted(cls, c_type: SUPPORTED_CTS, val: Decimal) -> Self:
+        """Build an instance out of already validated fields, skipping validation.
+        Only use it when `c_type` is the one of `cls` and `val` is a Decimal.
+        """
+        obj = _new_object(cls)
+        _set_dict(obj, {"c_type": c_type, "val": val})
+        _set_fields_set(obj, {"c_type", "val"})
+        _set_extra(obj, None)
+        _set_private(obj, None)
+        return obj
+
     def convert_to(self, other_currency: OtherCT, rate: Decimal) -> "BaseCurrency[OtherCT]":
-        return AnyCurrency.validate_python(
-            {"c_type": other_currency, "val": self.val * rate}  # type: ignore
-        )
+        model = CURRENCY_MODELS[other_currency]
+        return model._trusted(other_currency, self.val * rate)  # type: ignore
+
+    def to_minor(self, rounding: str = ROUND_HALF_EVEN) -> "MinorUnits[Self]":
+        """This amount as an integer number of minor units, rounding at `minor_scale` places"""
+        return MinorUnits.from_model(self, rounding)
 
     def check_if_self(self, other: "BaseCurrency[CT]"):
         # type system avoid this state, but still ehh
@@ -60,11 +91,11 @@ class BaseCurrency(BaseModel, Generic[CT], ABC):
 
     def __add__(self, other: "BaseCurrency[CT]") -> "BaseCurrency[CT]":
         self.check_if_self(other)
-        return self.__class__(c_type=self.c_type, val=self.val + other.val)
+        return self._trusted(self.c_type, self.val + other.val)
 
     def __sub__(self, other: "BaseCurrency[CT]") -> "BaseCurrency[CT]":
         self.check_if_self(other)
-        return self.__class__(c_type=self.c_type, val=self.val - other.val)
+        return self._trusted(self.c_type, self.val - other.val)
 
     def __hash__(self) -> int:
         return hash((self.c_type, self.val))
@@ -79,4 +110,69 @@ class EURCurrency(BaseCurrency[Literal[CurrencyEnum.EURO]]):
 
 
 DiscriminatedCurrency = Annotated[Union[USDCurrency, EURCurrency], Field(discriminator="c_type")]
-AnyCurrency = TypeAdapter(DiscriminatedCurrency)
+AnyCurrency = TypeAdapter(DiscriminatedCurrency, config=ConfigDict(defer_build=True))
+
+CURRENCY_MODELS: dict[SUPPORTED_CTS, type[DiscriminatedCurrency]] = {
+    CurrencyEnum.USD: USDCurrency,
+    CurrencyEnum.EURO: EURCurrency,
+}
+"""Model of each currency type"""
+
+
+class Money(Generic[CT]):
+    """A lightweight counterpart of `BaseCurrency` for hot loops.
+    It's a plain `__slots__` object that is never validated, so arithmetic costs an allocation
+    rather than a validation pass; convert back with `to_model` once you're out of the loop.
+    It's as type safe as `BaseCurrency`, mixing currency types raises `CantCompareException`.
+    """
+
+    __slots__ = ("c_type", "val")
+
+    def __init__(self, c_type: CT, val: Decimal) -> None:
+        self.c_type = c_type
+        self.val = val
+
+    @classmethod
+    def from_model(cls, currency: BaseCurrency[CT]) -> "Money[CT]":
+        return cls(currency.c_type, currency.val)
+
+    def to_model(self) -> BaseCurrency[CT]:
+        return CURRENCY_MODELS[self.c_type]._trusted(self.c_type, self.val)  # type: ignore
+
+    def check_if_self(self, other: "Money[CT]"):
+        if self.c_type != other.c_type:
+            raise CantCompareException(f"Cannot do action {self.c_type} with {other.c_type}")
+
+    def __eq__(self, other: "Money[CT]") -> bool:  # type: ignore[override]
+        self.check_if_self(other)
+        return self.val == other.val
+
+    def __lt__(self, other: "Money[CT]") -> bool:
+        self.check_if_self(other)
+        return self.val < other.val
+
+    def __le__(self, other: "Money[CT]") -> bool:
+        self.check_if_self(other)
+        return self.val <= other.val
+
+    def __gt__(self, other: "Money[CT]") -> bool:
+        self.check_if_self(other)
+        return self.val > other.val
+
+    def __ge__(self, other: "Money[CT]") -> bool:
+        self.check_if_self(other)
+        return self.val >= other.val
+
+    def __add__(self, other: "Money[CT]") -> "Money[CT]":
+        self.check_if_self(other)
+        return Money(self.c_type, self.val + other.val)
+
+    def __sub__(self, other: "Money[CT]") -> "Money[CT]":
+        self.check_if_self(other)
+        return Money(self.c_type, self.val - other.val)
+
+    def __hash__(self) -> int:
+        return hash((self.c_type, self.val))
+
+    def __repr__(self) -> str:
+        return f"Money(c_type={self.c_type!r}, val={self.val!r})"
@@ -1,5 +1,4 @@
-class BaseFinancialException(Exception):
-    ...
+class BaseFinancialException(Exception): ...
 
 
 class CantCompareException(BaseFinancialException):
@@ -8,3 +7,7 @@ class CantCompareException(BaseFinancialException):
 
 class ConverterNotMapped(BaseFinancialException):
     """Converter Client does not support requested spefiec exchange"""
+
+
+class RateNotAvailable(BaseFinancialException):
+    """No exchange rate is known for the requested time"""
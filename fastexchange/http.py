@@ -1,9 +1,11 @@
+import asyncio
+import time
 import typing
-from contextlib import contextmanager
-from functools import lru_cache
+from contextlib import asynccontextmanager, contextmanager
 from http.cookiejar import CookieJar
+from weakref import WeakKeyDictionary
 
-from httpx import AsyncClient
+from httpx import AsyncClient, Limits, ResponseNotRead
 from httpx._client import USE_CLIENT_DEFAULT, UseClientDefault
 from httpx._config import Timeout
 from httpx._models import Request, Response
@@ -21,6 +23,10 @@ from httpx._types import (
 )
 from typing_extensions import Self
 
+from . import metrics
+from .httpcache import ResponseCache
+from .ratelimit import THROTTLE_STATUS_CODES, RateLimiter, retry_after
+
 
 class NullCookieJar(CookieJar):
     """A CookieJar that does not support setting cookie"""
@@ -47,23 +53,102 @@ class BaseClient:
         This would result in getting the client easily detected.
     But with this implementation, client isolate request and response from its global state.
     If you need to set cookie on next request, you should do it explicitly.
+    Requests go through `limiter`, which paces them per host and retries throttled ones,
+    see `RateLimiter`. GET responses can be cached and revalidated by passing a `cache`,
+    see `ResponseCache`; streamed requests use what's cached but never add to it.
     """
 
-    def __init__(self, *args, **kwargs) -> None:
+    def __init__(
+        self,
+        *args,
+        limiter: typing.Optional[RateLimiter] = None,
+        cache: typing.Optional[ResponseCache] = None,
+        **kwargs,
+    ) -> None:
+        self.limiter = limiter if limiter is not None else RateLimiter()
+        self.cache = cache
         self._client = AsyncClient(*args, **kwargs)
         self._client.cookies = NullCookieJar()
+        self._close_callbacks: list[typing.Callable[[], typing.Awaitable[None]]] = []
+
+    def on_close(self, callback: typing.Callable[[], typing.Awaitable[None]]) -> None:
+        """Await `callback` when this client is closed, before its connections are closed"""
+        self._close_callbacks.append(callback)
+
+    async def _run_close_callbacks(self) -> None:
+        callbacks, self._close_callbacks = self._close_callbacks, []
+        for callback in callbacks:
+            await callback()
+
+    async def send(self, request: Request, **kwargs) -> Response:
+        key = None if self.cache is None else self.cache.key(request)
+        if key is None:
+            return await self._send(request, **kwargs)
+
+        assert self.cache is not None
+        entry, fresh = self.cache.lookup(key, request)
+        if entry is not None and fresh:
+            return entry.to_response(request)
+        resp = await self._send(request, **kwargs)
+        if entry is not None and resp.status_code == 304:
+            await resp.aclose()
+            return self.cache.revalidated(key, entry, resp).to_response(request)
+        # storing a streamed response would mean reading all of it up front, which defeats
+        # streaming it, e.g. to stop reading as soon as the needed part has arrived
+        if not kwargs.get("stream") and self.cache.storable(resp):
+            self.cache.save(key, resp)
+        return resp
+
+    async def _send(self, request: Request, **kwargs) -> Response:
+        host = self.limiter.for_host(request.url.host)
+        attempt = 0
+        while True:
+            async with host.slot():
+                if metrics.recorder is None:
+                    resp = await self._client.send(request, **kwargs)
+                else:
+                    resp = await self._send_recorded(request, **kwargs)
+            if resp.status_code not in THROTTLE_STATUS_CODES:
+                host.concurrency.on_success()
+                return resp
 
-    async def send(self, *args, **kwargs) -> Response:
-        return await self._client.send(*args, **kwargs)
+            if metrics.recorder is not None:
+                metrics.recorder("http.throttled", request.url.host, 1)
+            wait = retry_after(resp)
+            host.on_throttle(wait)
+            if attempt >= self.limiter.max_retries:
+                return resp
+            await resp.aclose()
+            await asyncio.sleep(self.limiter.backoff_delay(attempt, wait))
+            attempt += 1
+
+    async def _send_recorded(self, request: Request, **kwargs) -> Response:
+        host = request.url.host
+        if "trace" not in request.extensions:
+            request.extensions["trace"] = metrics.http_trace(host)
+        started = time.perf_counter()
+        try:
+            resp = await self._client.send(request, **kwargs)
+        except Exception:
+            if metrics.recorder is not None:
+                metrics.recorder("http.error", host, 1)
+            raise
+        if metrics.recorder is not None:
+            metrics.recorder("http.request", host, time.perf_counter() - started)
+            if not kwargs.get("stream"):
+                metrics.recorder("http.response_bytes", host, len(resp.content))
+        return resp
 
     async def __aenter__(self) -> Self:
         await self._client.__aenter__()
         return self
 
     async def __aexit__(self, *args, **kwargs) -> None:
+        await self._run_close_callbacks()
         await self._client.__aexit__(*args, **kwargs)
 
     async def aclose(self) -> None:
+        await self._run_close_callbacks()
         await self._client.aclose()
 
     def build_request(
@@ -132,6 +217,49 @@ class BaseClient:
         )
         return await self.send(request, auth=auth, follow_redirects=follow_redirects)
 
+    @asynccontextmanager
+    async def stream(
+        self,
+        method: str,
+        url: URLTypes,
+        *,
+        content: typing.Optional[RequestContent] = None,
+        data: typing.Optional[RequestData] = None,
+        files: typing.Optional[RequestFiles] = None,
+        json: typing.Optional[typing.Any] = None,
+        params: typing.Optional[QueryParamTypes] = None,
+        headers: typing.Optional[HeaderTypes] = None,
+        cookies: typing.Optional[CookieTypes] = None,
+        auth: typing.Union[AuthTypes, UseClientDefault, None] = USE_CLIENT_DEFAULT,
+        follow_redirects: typing.Union[bool, UseClientDefault] = USE_CLIENT_DEFAULT,
+        timeout: typing.Union[TimeoutTypes, UseClientDefault] = USE_CLIENT_DEFAULT,
+        extensions: typing.Optional[RequestExtensions] = None,
+    ) -> typing.AsyncIterator[Response]:
+        """
+        Send a request, without reading the response body up front.
+        The connection is released when the block exits, even if the body wasn't fully read.
+        """
+        request = self.build_request(
+            method=method,
+            url=url,
+            content=content,
+            data=data,
+            files=files,
+            json=json,
+            params=params,
+            headers=headers,
+            cookies=cookies,
+            timeout=timeout,
+            extensions=extensions,
+        )
+        response = await self.send(
+            request, stream=True, auth=auth, follow_redirects=follow_redirects
+        )
+        try:
+            yield response
+        finally:
+            await response.aclose()
+
     async def get(
         self,
         url: URLTypes,
@@ -354,12 +482,72 @@ def validate_response(resp: Response, expected_status_code: int):
 
 class RequestFailed(Exception):
     def __init__(self, resp: Response):
+        try:
+            text = resp.text
+        except ResponseNotRead:  # a streamed response, that we stopped reading
+            text = f"<{resp.status_code} streamed body>"
         message = (
-            f"Response: {resp.text}\nRequest: url={resp.request.url} headers={resp.request.headers}"
+            f"Response: {text}\nRequest: url={resp.request.url} headers={resp.request.headers}"
         )
         super().__init__(message)
 
 
-@lru_cache
-def get_client():
-    return BaseClient()
+DEFAULT_LIMITS = Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30)
+DEFAULT_TIMEOUT = Timeout(10, connect=5)
+
+
+class ClientRegistry:
+    """Keeps one `BaseClient` per event loop, the one `get_client` returns.
+    An httpx client's connections belong to the loop they were opened in, so sharing a single
+    client breaks as soon as the process runs a second loop; e.g. `asyncio.run` called twice,
+    or loops in threads. Each loop gets its own pooled client instead, created on first use with
+    the registry's settings, and dropped along with its loop.
+    `http2=True` needs the `h2` package, installed by `pip install httpx[http2]`.
+    """
+
+    def __init__(
+        self,
+        limits: Limits = DEFAULT_LIMITS,
+        timeout: Timeout = DEFAULT_TIMEOUT,
+        http2: bool = False,
+        **client_kwargs: typing.Any,
+    ) -> None:
+        self.settings: dict[str, typing.Any] = dict(
+            limits=limits, timeout=timeout, http2=http2, **client_kwargs
+        )
+        self._clients: WeakKeyDictionary[
+            asyncio.AbstractEventLoop, BaseClient
+        ] = WeakKeyDictionary()
+
+    def configure(self, **settings: typing.Any) -> None:
+        """Update the settings of clients created from now on, see `BaseClient` for them"""
+        self.settings.update(settings)
+
+    def get(self) -> BaseClient:
+        """Client of the running event loop"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            raise RuntimeError("get_client() must be called from a running event loop") from None
+        client = self._clients.get(loop)
+        if client is None:
+            client = self._clients[loop] = BaseClient(**self.settings)
+        return client
+
+    async def aclose(self) -> None:
+        """Close the running loop's client, the next `get` makes a new one"""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+
+clients = ClientRegistry()
+
+
+def get_client() -> BaseClient:
+    return clients.get()
+
+
+async def aclose_client() -> None:
+    """Shutdown hook, close the pooled client of the running event loop"""
+    await clients.aclose()
@@ -0,0 +1,253 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from os import PathLike
+from typing import Callable, NamedTuple, Protocol, Union
+
+from httpx import Headers, Request, Response
+
+from . import metrics
+
+STORABLE_STATUS_CODES = frozenset({200, 203, 300, 301, 404, 410})
+
+# the cached body is stored decoded, so these no longer describe it
+DROPPED_HEADERS = frozenset({"content-encoding", "content-length", "transfer-encoding"})
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    status_code INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    content BLOB NOT NULL,
+    fresh_until REAL NOT NULL,
+    stored_at REAL NOT NULL
+);
+"""
+
+
+class CachedResponse(NamedTuple):
+    status_code: int
+    headers: list[tuple[str, str]]
+    content: bytes
+    fresh_until: float
+    """Unix time after which the response has to be revalidated"""
+
+    def to_response(self, request: Request) -> Response:
+        return Response(
+            self.status_code, headers=self.headers, content=self.content, request=request
+        )
+
+
+class ResponseStore(Protocol):
+    def get(self, key: str) -> Union[CachedResponse, None]: ...
+
+    def set(self, key: str, entry: CachedResponse) -> None: ...
+
+
+class MemoryStore:
+    """Keeps up to `maxsize` responses and `max_bytes` of body, evicting least recently used ones.
+    It's safe to share between threads, like `ClientRegistry.configure(cache=...)` does with the
+    clients of every event loop.
+    """
+
+    def __init__(self, maxsize: int = 256, max_bytes: int = 32 * 1024 * 1024) -> None:
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Union[CachedResponse, None]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CachedResponse) -> None:
+        if len(entry.content) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old.content)
+            self._entries[key] = entry
+            self._size += len(entry.content)
+            while len(self._entries) > self.maxsize or self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.content)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DiskStore:
+    """Keeps up to `maxsize` responses in a SQLite database, so they outlive the process.
+    Like `MemoryStore`, it's safe to share between threads.
+    """
+
+    def __init__(self, path: Union[str, "PathLike[str]"], maxsize: int = 4096) -> None:
+        self.maxsize = maxsize
+        # the connection is used from whichever thread runs a client's loop, one at a time
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def get(self, key: str) -> Union[CachedResponse, None]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status_code, headers, content, fresh_until FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+        status_code, raw_headers, content, fresh_until = row
+        headers = [(name, value) for name, value in json.loads(raw_headers)]
+        return CachedResponse(status_code, headers, content, fresh_until)
+
+    def set(self, key: str, entry: CachedResponse) -> None:
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    entry.status_code,
+                    json.dumps(entry.headers),
+                    entry.content,
+                    entry.fresh_until,
+                    time.time(),
+                ),
+            )
+            self._db.execute(
+                "DELETE FROM responses WHERE key NOT IN "
+                "(SELECT key FROM responses ORDER BY stored_at DESC LIMIT ?)",
+                (self.maxsize,),
+            )
+
+
+def cache_control(headers: Headers) -> dict[str, Union[str, None]]:
+    directives: dict[str, Union[str, None]] = {}
+    for value in headers.get_list("Cache-Control", split_commas=True):
+        name, _, argument = value.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"') or None
+    return directives
+
+
+def parse_http_date(value: Union[str, None]) -> Union[float, None]:
+    if value is None:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+class ResponseCache:
+    """A private HTTP cache for `BaseClient`, of GET responses.
+    A response is served from `store` while it's fresh, as `Cache-Control: max-age` or `Expires`
+    say. After that, or when it's `no-cache`, the request is sent again with `If-None-Match` /
+    `If-Modified-Since`, and a 304 is answered with the stored body instead of a new download.
+    `no-store` responses, and responses setting cookies, are never stored.
+    Entries are keyed by the URL and every header of the request, so a response is only ever
+    reused for a request identical to the one that fetched it, which keeps requests as isolated
+    from each other as `NullCookieJar` does.
+    """
+
+    def __init__(
+        self, store: Union[ResponseStore, None] = None, timer: Callable[[], float] = time.time
+    ) -> None:
+        self.store = store if store is not None else MemoryStore()
+        self._timer = timer
+
+    @staticmethod
+    def key(request: Request) -> Union[str, None]:
+        """Cache key of `request`, or None if it can't be answered from the cache"""
+        if request.method != "GET" or "no-store" in cache_control(request.headers):
+            return None
+        digest = hashlib.sha256(str(request.url).encode())
+        for name, value in sorted(request.headers.multi_items()):
+            digest.update(f"\n{name}: {value}".encode())
+        return digest.hexdigest()
+
+    def lookup(self, key: str, request: Request) -> tuple[Union[CachedResponse, None], bool]:
+        """The stored response for `key`, if any, and whether it can be used as is.
+        If it can't, `request` is made conditional so the server can answer with a 304.
+        """
+        entry = self.store.get(key)
+        if entry is None:
+            if metrics.recorder is not None:
+                metrics.recorder("cache.miss", "http", 1)
+            return None, False
+        if entry.fresh_until > self._timer() and "no-cache" not in cache_control(request.headers):
+            if metrics.recorder is not None:
+                metrics.recorder("cache.hit", "http", 1)
+            return entry, True
+
+        if metrics.recorder is not None:
+            metrics.recorder("cache.stale", "http", 1)
+        headers = Headers(entry.headers)
+        if "ETag" in headers:
+            request.headers["If-None-Match"] = headers["ETag"]
+        if "Last-Modified" in headers:
+            request.headers["If-Modified-Since"] = headers["Last-Modified"]
+        return entry, False
+
+    def revalidated(self, key: str, entry: CachedResponse, resp: Response) -> CachedResponse:
+        """Store `entry` again, with the updated headers and freshness of the 304 `resp`"""
+        headers = Headers(entry.headers)
+        headers.update({k: v for k, v in resp.headers.items() if k.lower() not in DROPPED_HEADERS})
+        entry = entry._replace(
+            headers=headers.multi_items(), fresh_until=self._fresh_until(headers)
+        )
+        self.store.set(key, entry)
+        return entry
+
+    def storable(self, resp: Response) -> bool:
+        headers = resp.headers
+        directives = cache_control(headers)
+        return (
+            resp.status_code in STORABLE_STATUS_CODES
+            and "no-store" not in directives
+            and "set-cookie" not in headers
+            and headers.get("Vary") != "*"
+            and (
+                self._fresh_until(headers) > self._timer()
+                or "ETag" in headers
+                or "Last-Modified" in headers
+            )
+        )
+
+    def save(self, key: str, resp: Response) -> None:
+        """Store `resp`, which must have been read already"""
+        headers = [
+            (k, v) for k, v in resp.headers.multi_items() if k.lower() not in DROPPED_HEADERS
+        ]
+        fresh_until = self._fresh_until(resp.headers)
+        self.store.set(key, CachedResponse(resp.status_code, headers, resp.content, fresh_until))
+
+    def _fresh_until(self, headers: Headers) -> float:
+        now = self._timer()
+        directives = cache_control(headers)
+        if "no-cache" in directives:
+            return now
+        max_age = directives.get("max-age")
+        if max_age is not None:
+            try:
+                return now + max(0, int(max_age))
+            except ValueError:
+                return now
+        expires = parse_http_date(headers.get("Expires"))
+        if expires is None:
+            return now
+        date = parse_http_date(headers.get("Date"))
+        # trust the server's clock for the lifetime, not for the absolute time
+        return now + expires - (date if date is not None else now)
@@ -0,0 +1,179 @@
+"""Instrumentation of the library's hot paths.
+
+Instrumented code reports `(metric, label, value)` events to `recorder`, which is None unless
+enabled, so while disabled it costs an attribute check per event. Enable it with the default
+`Metrics` collector and read its `snapshot()`, or pass any callable to export events elsewhere.
+
+Metrics, and what their label and value are:
+
+- `http.request`: host, seconds from sending a request to getting its response headers
+- `http.connect`, `http.tls`, `http.ttfb`: host, seconds to connect, TLS handshake and first byte
+- `http.response_bytes`: host, body size of fully read responses
+- `http.error`: host, a request that raised; `http.throttled`: host, a 429/503 response
+- `converter.parse`: converter class, seconds spent extracting a rate from a page
+- `transfers.validate`: model name, seconds spent validating a page of transfers
+- `cache.hit`, `cache.miss`, `cache.stale`: `RateCache.name`, or `http` for `ResponseCache`,
+  one lookup
+"""
+
+import math
+import time
+from typing import Any, Awaitable, Callable, NamedTuple, Union
+
+Recorder = Callable[[str, str, float], None]
+
+recorder: Union[Recorder, None] = None
+"""Receives every event while enabled"""
+
+
+class HistogramSnapshot(NamedTuple):
+    count: int
+    total: float
+    minimum: float
+    maximum: float
+    buckets: dict[float, int]
+    """Number of values per bucket, keyed by the bucket's upper bound; buckets are powers of 2"""
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        """Approximate `q`th percentile, as the upper bound of the bucket it falls in"""
+        rank = q / 100 * self.count
+        seen = 0
+        for bound, count in sorted(self.buckets.items()):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.maximum)
+        return self.maximum
+
+
+class Histogram:
+    """Values bucketed by their binary exponent, which fits seconds and bytes alike"""
+
+    __slots__ = ("count", "total", "minimum", "maximum", "_buckets")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self._buckets: dict[int, int] = {}
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+        exponent = math.frexp(value)[1] if value > 0 else -1074
+        self._buckets[exponent] = self._buckets.get(exponent, 0) + 1
+
+    def snapshot(self) -> HistogramSnapshot:
+        return HistogramSnapshot(
+            count=self.count,
+            total=self.total,
+            minimum=self.minimum,
+            maximum=self.maximum,
+            buckets={math.ldexp(1, exponent): count for exponent, count in self._buckets.items()},
+        )
+
+
+class MetricsSnapshot(NamedTuple):
+    histograms: dict[tuple[str, str], HistogramSnapshot]
+    """Keyed by metric and label"""
+
+    def count(self, metric: str, label: str = "") -> int:
+        histogram = self.histograms.get((metric, label))
+        return 0 if histogram is None else histogram.count
+
+    def hit_ratio(self, label: str = "rate") -> float:
+        hits = self.count("cache.hit", label)
+        lookups = hits + self.count("cache.miss", label) + self.count("cache.stale", label)
+        return hits / lookups if lookups else 0.0
+
+
+class Metrics:
+    """The default recorder, keeps a histogram per metric and label"""
+
+    def __init__(self) -> None:
+        self._histograms: dict[tuple[str, str], Histogram] = {}
+
+    def __call__(self, metric: str, label: str, value: float) -> None:
+        histogram = self._histograms.get((metric, label))
+        if histogram is None:
+            histogram = self._histograms[(metric, label)] = Histogram()
+        histogram.observe(value)
+
+    def snapshot(self) -> MetricsSnapshot:
+        return MetricsSnapshot({key: h.snapshot() for key, h in self._histograms.items()})
+
+    def reset(self) -> None:
+        self._histograms.clear()
+
+
+def enable(callback: Union[Recorder, None] = None) -> Recorder:
+    """Start recording to `callback`, a new `Metrics` by default, and return it"""
+    global recorder
+    recorder = callback if callback is not None else Metrics()
+    return recorder
+
+
+def disable() -> None:
+    global recorder
+    recorder = None
+
+
+class Stopwatch:
+    """Adds up the time spent in one or more `with` blocks of an operation, then `report`s it.
+    It's a no-op unless recording was enabled when the stopwatch was made.
+    """
+
+    __slots__ = ("metric", "label", "elapsed", "enabled", "_started")
+
+    def __init__(self, metric: str, label: str) -> None:
+        self.metric = metric
+        self.label = label
+        self.elapsed = 0.0
+        self.enabled = recorder is not None
+        self._started = 0.0
+
+    def __enter__(self) -> None:
+        if self.enabled:
+            self._started = time.perf_counter()
+
+    def __exit__(self, *exc_info: object) -> None:
+        if self.enabled:
+            self.elapsed += time.perf_counter() - self._started
+
+    def report(self) -> None:
+        if self.enabled and recorder is not None:
+            recorder(self.metric, self.label, self.elapsed)
+
+
+def http_trace(host: str) -> Callable[[str, dict[str, Any]], Awaitable[None]]:
+    """A callback for httpx's `trace` request extension, that times connecting, the TLS handshake
+    and the time to first byte, as the connection pool reports them
+    """
+    started: dict[str, float] = {}
+
+    async def trace(event: str, info: dict[str, Any]) -> None:
+        step, _, stage = event.rpartition(".")
+        step = step.rpartition(".")[2]
+        if stage == "started":
+            started[step] = time.perf_counter()
+            return
+        if stage != "complete" or recorder is None:
+            return
+        if step == "connect_tcp" or step == "start_tls":
+            since = started.get(step)
+            metric = "http.connect" if step == "connect_tcp" else "http.tls"
+        elif step == "receive_response_headers":
+            since = started.get("send_request_headers")
+            metric = "http.ttfb"
+        else:
+            return
+        if since is not None:
+            recorder(metric, host, time.perf_counter() - since)
+
+    return trace
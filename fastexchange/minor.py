@@ -0,0 +1,105 @@
+from decimal import ROUND_HALF_EVEN, Decimal
+from typing import TYPE_CHECKING, Any, Generic, Iterable, TypeVar, Union, cast
+
+from .exceptions import CantCompareException
+
+if TYPE_CHECKING:
+    from .crypto.types import BaseCryptoToken
+    from .currency import BaseCurrency
+
+M = TypeVar("M", bound=Union["BaseCurrency", "BaseCryptoToken"])
+OtherM = TypeVar("OtherM", bound=Union["BaseCurrency", "BaseCryptoToken"])
+
+
+class MinorUnits(Generic[M]):
+    """An amount of a currency or token as an integer number of its minor units, the opt-in exact
+    fixed-point counterpart of the Decimal models.
+    Each model has a `minor_scale`, 2 for currencies (cents) and 6 for USDT, so `units=1050` of
+    `USDCurrency` is 10.50 USD. Rounding only happens at the boundaries, `from_model` and
+    `convert_to`, half to even unless told otherwise; in between, arithmetic, comparisons and
+    hashing are plain integer operations. Mixing models raises `CantCompareException`.
+    `CurrencyBatch` keeps 6 places by default whatever the currency, so conversions don't lose
+    sub-cent precision; a batch built with `scale=model.minor_scale` holds the same integers as
+    the `units` of this model's amounts.
+    """
+
+    __slots__ = ("model", "units")
+
+    def __init__(self, model: type[M], units: int) -> None:
+        self.model = model
+        self.units = units
+
+    @classmethod
+    def from_model(cls, amount: M, rounding: str = ROUND_HALF_EVEN) -> "MinorUnits[M]":
+        units = amount.val.scaleb(amount.minor_scale).to_integral_value(rounding)
+        return cls(type(amount), int(units))
+
+    @classmethod
+    def total(cls, model: type[M], amounts: Iterable["MinorUnits[M]"]) -> "MinorUnits[M]":
+        """Sum of `amounts`, which must all be of `model`"""
+        units = 0
+        for amount in amounts:
+            if amount.model is not model:
+                raise CantCompareException(f"Cannot do action {model} with {amount.model}")
+            units += amount.units
+        return cls(model, units)
+
+    @property
+    def scale(self) -> int:
+        return self.model.minor_scale
+
+    def to_decimal(self) -> Decimal:
+        return Decimal(self.units).scaleb(-self.model.minor_scale)
+
+    def to_model(self) -> M:
+        # the concrete models default their discriminator, the base classes `M` is bound to don't
+        return cast("type[Any]", self.model)(val=self.to_decimal())
+
+    def convert_to(
+        self, model: type[OtherM], rate: Decimal, rounding: str = ROUND_HALF_EVEN
+    ) -> "MinorUnits[OtherM]":
+        """This amount in `model` at `rate`, rounded to `model`'s minor units"""
+        shift = model.minor_scale - self.model.minor_scale
+        units = (Decimal(self.units) * rate).scaleb(shift).to_integral_value(rounding)
+        return MinorUnits(model, int(units))
+
+    def check_if_self(self, other: "MinorUnits[M]"):
+        if self.model is not other.model:
+            raise CantCompareException(f"Cannot do action {self.model} with {other.model}")
+
+    def __eq__(self, other: "MinorUnits[M]") -> bool:  # type: ignore[override]
+        self.check_if_self(other)
+        return self.units == other.units
+
+    def __lt__(self, other: "MinorUnits[M]") -> bool:
+        self.check_if_self(other)
+        return self.units < other.units
+
+    def __le__(self, other: "MinorUnits[M]") -> bool:
+        self.check_if_self(other)
+        return self.units <= other.units
+
+    def __gt__(self, other: "MinorUnits[M]") -> bool:
+        self.check_if_self(other)
+        return self.units > other.units
+
+    def __ge__(self, other: "MinorUnits[M]") -> bool:
+        self.check_if_self(other)
+        return self.units >= other.units
+
+    def __add__(self, other: "MinorUnits[M]") -> "MinorUnits[M]":
+        self.check_if_self(other)
+        return MinorUnits(self.model, self.units + other.units)
+
+    def __sub__(self, other: "MinorUnits[M]") -> "MinorUnits[M]":
+        self.check_if_self(other)
+        return MinorUnits(self.model, self.units - other.units)
+
+    def __neg__(self) -> "MinorUnits[M]":
+        return MinorUnits(self.model, -self.units)
+
+    def __hash__(self) -> int:
+        return hash((self.model, self.units))
+
+    def __repr__(self) -> str:
+        return f"MinorUnits({self.model.__name__}, units={self.units})"
@@ -0,0 +1,189 @@
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Callable, Union
+from weakref import WeakKeyDictionary
+
+from httpx import Response
+
+THROTTLE_STATUS_CODES = frozenset({429, 503})
+
+
+def retry_after(resp: Response) -> Union[float, None]:
+    """Seconds to wait as asked by the `Retry-After` header, in either of its formats"""
+    value = resp.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if at.tzinfo is None:
+        # "-0000" dates parse as naive, they're in UTC all the same
+        at = at.replace(tzinfo=timezone.utc)
+    return max(0.0, (at - datetime.now(timezone.utc)).total_seconds())
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, and bursts of up to `burst`"""
+
+    def __init__(
+        self, rate: float, burst: int = 1, timer: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._timer = timer
+        self._tokens = float(burst)
+        self._updated = timer()
+
+    async def acquire(self) -> None:
+        while True:
+            now = self._timer()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class LoopSlots:
+    """Requests in flight on one event loop, and the condition their waiters wait on"""
+
+    __slots__ = ("in_flight", "released")
+
+    def __init__(self) -> None:
+        self.in_flight = 0
+        self.released = asyncio.Condition()
+
+
+class AdaptiveConcurrency:
+    """A concurrency limit that adapts to what the upstream accepts, AIMD style like TCP does.
+    Every successful response grows the limit by about one per limit's worth of responses, and
+    a throttled one cuts it by `decrease`, at most once per `cooldown` seconds: a burst of 429s
+    answering requests sent at the same limit is one signal, not one per response.
+    The limit is shared by every event loop using this, but each loop counts its own requests
+    against it, since an asyncio condition only works within the loop it was first used in.
+    """
+
+    def __init__(
+        self,
+        initial: int = 32,
+        minimum: int = 1,
+        maximum: int = 256,
+        decrease: float = 0.5,
+        cooldown: float = 1.0,
+        timer: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self._loops: "WeakKeyDictionary[asyncio.AbstractEventLoop, LoopSlots]" = WeakKeyDictionary()
+        self._timer = timer
+        self._decreased_at: Union[float, None] = None
+
+    @property
+    def in_flight(self) -> int:
+        return sum(slots.in_flight for slots in list(self._loops.values()))
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        loop = asyncio.get_running_loop()
+        slots = self._loops.get(loop)
+        if slots is None:
+            slots = self._loops[loop] = LoopSlots()
+        async with slots.released:
+            await slots.released.wait_for(lambda: slots.in_flight < int(self.limit))
+            slots.in_flight += 1
+        try:
+            yield
+        finally:
+            slots.in_flight -= 1
+            async with slots.released:
+                slots.released.notify_all()
+
+    def on_success(self) -> None:
+        self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+    def on_throttle(self) -> None:
+        now = self._timer()
+        if self._decreased_at is not None and now - self._decreased_at < self.cooldown:
+            return
+        self._decreased_at = now
+        self.limit = max(self.minimum, self.limit * self.decrease)
+
+
+class HostLimiter:
+    """Everything that limits the requests to one host"""
+
+    def __init__(self, bucket: Union[TokenBucket, None], concurrency: AdaptiveConcurrency) -> None:
+        self.bucket = bucket
+        self.concurrency = concurrency
+        self.blocked_until = 0.0
+        """Monotonic time until which the host asked us to back off"""
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        async with self.concurrency.slot():
+            delay = self.blocked_until - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if self.bucket is not None:
+                await self.bucket.acquire()
+            yield
+
+    def on_throttle(self, wait: Union[float, None]) -> None:
+        self.concurrency.on_throttle()
+        if wait is not None:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + wait)
+
+
+class RateLimiter:
+    """Per host rate limiting for `BaseClient`.
+    Each host gets an optional token bucket of `rate` requests per second (None means no cap) and
+    an adaptive concurrency limit. Responses with a throttling status (429, 503) shrink that limit,
+    hold the host back for as long as `Retry-After` says, and are retried up to `max_retries` times
+    with jittered exponential backoff; the last throttled response is returned as is.
+    """
+
+    def __init__(
+        self,
+        rate: Union[float, None] = None,
+        burst: int = 1,
+        initial_concurrency: int = 32,
+        max_concurrency: int = 256,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 30,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.initial_concurrency = initial_concurrency
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._hosts: dict[str, HostLimiter] = {}
+
+    def for_host(self, host: str) -> HostLimiter:
+        limiter = self._hosts.get(host)
+        if limiter is None:
+            bucket = None if self.rate is None else TokenBucket(self.rate, self.burst)
+            concurrency = AdaptiveConcurrency(
+                self.initial_concurrency, maximum=self.max_concurrency
+            )
+            limiter = self._hosts[host] = HostLimiter(bucket, concurrency)
+        return limiter
+
+    def backoff_delay(self, attempt: int, wait: Union[float, None]) -> float:
+        delay = min(self.max_backoff, self.backoff * 2**attempt) * random.uniform(0.5, 1)
+        return max(delay, wait or 0)
@@ -0,0 +1,134 @@
+"""Blocking API, for synchronous code like Celery tasks or Django views.
+
+Calling `asyncio.run` per call makes a new event loop each time, and with it a new connection
+pool. Instead, everything here runs on one long-lived loop in a background thread, so sync
+callers share one pooled client and the converters' caches, just like async callers do.
+It's safe to call from many threads at once, each call is handed over to that loop.
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+from datetime import datetime
+from typing import Any, Callable, Coroutine, Iterable, TypeVar, Union
+
+from .converter.base_client import BaseConverter, ToCurrency
+from .crypto.schema import TokenTransfer, Transfers
+from .crypto.store import TransferStore
+from .crypto.usdt import TransactionsResult, Trc20Gateway
+from .currency import DiscriminatedCurrency
+from .http import aclose_client
+
+T = TypeVar("T")
+
+
+class BackgroundLoop:
+    """An event loop running in a daemon thread, started on first use"""
+
+    def __init__(self) -> None:
+        self._loop: Union[asyncio.AbstractEventLoop, None] = None
+        self._thread: Union[threading.Thread, None] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=loop.run_forever, name="fastexchange-loop", daemon=True
+                )
+                thread.start()
+                self._loop, self._thread = loop, thread
+            return self._loop
+
+    def run(self, coro: Coroutine[Any, Any, T], timeout: Union[float, None] = None) -> T:
+        """Run `coro` on the background loop, and block until it's done.
+        If it isn't done within `timeout` seconds, it's cancelled and `TimeoutError` is raised.
+        """
+        loop = self.loop
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("Cannot block on the background loop from its own thread")
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            # otherwise it keeps running on the loop with nobody waiting for it
+            future.cancel()
+            raise
+
+    def call(self, fn: Callable[..., T], *args: Any) -> T:
+        """Call a plain function on the background loop, for state that's only touched there"""
+
+        async def call() -> T:
+            return fn(*args)
+
+        return self.run(call())
+
+    def stop(self) -> None:
+        """Close the loop's client and stop the loop, the next call starts a new one"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None or thread is None:
+            return
+        asyncio.run_coroutine_threadsafe(aclose_client(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+default_loop = BackgroundLoop()
+
+
+def run(coro: Coroutine[Any, Any, T], timeout: Union[float, None] = None) -> T:
+    return default_loop.run(coro, timeout)
+
+
+def shutdown() -> None:
+    default_loop.stop()
+
+
+class SyncConverter:
+    """Blocking wrapper of a converter, see `BaseConverter` for the methods"""
+
+    def __init__(self, converter: BaseConverter, loop: BackgroundLoop = default_loop) -> None:
+        self.converter = converter
+        self._loop = loop
+
+    def exchange(self, from_: DiscriminatedCurrency, to: type[ToCurrency]) -> ToCurrency:
+        return self._loop.run(self.converter.exchange(from_, to))
+
+    def exchange_many(
+        self, amounts: Iterable[DiscriminatedCurrency], to: type[ToCurrency]
+    ) -> list[ToCurrency]:
+        return self._loop.run(self.converter.exchange_many(amounts, to))
+
+    def exchange_at(
+        self,
+        amounts_with_timestamps: Iterable[tuple[DiscriminatedCurrency, datetime]],
+        to: type[ToCurrency],
+    ) -> list[ToCurrency]:
+        return self._loop.call(self.converter.exchange_at, amounts_with_timestamps, to)
+
+
+class SyncTrc20Gateway:
+    """Blocking wrapper of `Trc20Gateway`"""
+
+    def __init__(
+        self, gateway: Union[Trc20Gateway, None] = None, loop: BackgroundLoop = default_loop
+    ) -> None:
+        self.gateway = gateway or Trc20Gateway()
+        self._loop = loop
+
+    def check_transaction(self, wallet: str) -> Transfers:
+        return self._loop.run(self.gateway.check_transaction(wallet))
+
+    def check_transactions(
+        self, wallets: Iterable[str], concurrency: int = 10
+    ) -> TransactionsResult:
+        return self._loop.run(self.gateway.check_transactions(wallets, concurrency))
+
+    def sync(self, wallet: str, store: TransferStore) -> list[TokenTransfer]:
+        return self._loop.run(self.gateway.sync(wallet, store))
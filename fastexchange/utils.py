@@ -1,3 +1,4 @@
+from datetime import datetime
 from enum import Enum
 
 
@@ -19,3 +20,13 @@ class StrEnum(str, Enum):
 
     def __str__(self) -> str:
         return str(self.value)
+
+
+def from_unit_ms(value):
+    """Parse unix time in milliseconds as a naive local datetime, other values are kept as is"""
+    return datetime.fromtimestamp(value / 1000) if isinstance(value, int) else value
+
+
+def to_unit_ms(value: datetime) -> int:
+    """Unix time in milliseconds of `value`, the inverse of `from_unit_ms`"""
+    return round(value.timestamp() * 1000)
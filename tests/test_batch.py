@@ -0,0 +1,44 @@
+from decimal import Decimal
+
+import pytest
+
+from fastexchange import CantCompareException, CurrencyBatch, EURCurrency, USDCurrency
+from fastexchange.currency import CurrencyEnum
+
+
+def test_batch_arithmetic():
+    ledger = [USDCurrency(val=Decimal(i) / 100) for i in range(1, 101)]
+    batch = CurrencyBatch.from_currencies(ledger)
+
+    assert batch.sum() == USDCurrency(val=Decimal("50.50"))
+    doubled = batch + batch
+    assert doubled.sum() == USDCurrency(val=Decimal("101.00"))
+    assert (doubled - batch).values() == [usd.val for usd in ledger]
+
+    cheap = batch.filter(batch.lt(USDCurrency(val=Decimal("0.05"))))
+    assert cheap.to_currencies() == ledger[:4]
+
+
+def test_batch_convert_to_rounds_half_even():
+    batch = CurrencyBatch.from_values(CurrencyEnum.USD, [Decimal("0.000001"), Decimal("0.000003")])
+    euros = batch.convert_to(CurrencyEnum.EURO, Decimal("0.5"))
+    assert euros.values() == [Decimal("0"), Decimal("0.000002")]
+    assert isinstance(euros.sum(), EURCurrency)
+
+
+def test_batch_is_type_safe():
+    batch = CurrencyBatch.from_currencies([USDCurrency(val=Decimal(1))])
+    with pytest.raises(CantCompareException):
+        batch + EURCurrency(val=Decimal(1))  # type: ignore (should always raise type error)
+    with pytest.raises(CantCompareException):
+        CurrencyBatch.from_currencies([USDCurrency(val=Decimal(1)), EURCurrency(val=Decimal(1))])
+
+
+def test_batch_rejects_values_past_64_bits():
+    with pytest.raises(ValueError):
+        CurrencyBatch.from_values(CurrencyEnum.USD, [Decimal("1e13")])
+
+    batch = CurrencyBatch.from_values(CurrencyEnum.USD, [Decimal("9e12")])
+    with pytest.raises(ValueError):
+        batch + batch
+    assert (batch - batch).sum().val == 0
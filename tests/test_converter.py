@@ -0,0 +1,303 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from decimal import Decimal
+from typing import Literal
+
+import httpx
+import pytest
+
+from fastexchange import (
+    BaseCurrency,
+    CurrencyMeUkClient,
+    EURCurrency,
+    RateNotAvailable,
+    USDCurrency,
+)
+from fastexchange.converter.base_client import BaseConverter
+from fastexchange.converter.cache import RateCache
+from fastexchange.converter.clients import AnswerScanner, parse_answer
+from fastexchange.converter.graph import RateGraph
+from fastexchange.converter.hedged import HedgedConverter
+from fastexchange.converter.history import RateHistory
+from fastexchange.converter.mappings import EURToUSD, FromToExchange, USDToEur
+from fastexchange.http import BaseClient, RequestFailed
+
+ANSWER_PAGE = b'<html><body><form><input id="answer" value="0.5"></form></body></html>'
+
+
+class FakeTimer:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_client(calls: list[str]) -> BaseClient:
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        return httpx.Response(200, content=ANSWER_PAGE)
+
+    return BaseClient(transport=httpx.MockTransport(handler))
+
+
+def test_rate_cache_ttl_and_lru():
+    timer = FakeTimer()
+    cache = RateCache(ttl=10, maxsize=1, timer=timer)
+
+    assert cache.get(USDToEur) is None
+    cache.set(USDToEur, Decimal("0.5"))
+    assert cache.get(USDToEur) == Decimal("0.5")
+
+    timer.now = 10
+    assert cache.get(USDToEur) is None
+
+    cache.set(EURToUSD, Decimal(2))
+    assert USDToEur not in cache
+    assert cache.stats == (1, 1, 1, 1, 1)
+
+
+def test_exchange_fetches_once_per_ttl():
+    calls: list[str] = []
+    timer = FakeTimer()
+    converter = CurrencyMeUkClient(make_client(calls), RateCache(ttl=60, timer=timer))
+
+    async def run():
+        for _ in range(3):
+            euro = await converter.exchange(USDCurrency(val=Decimal(4)), EURCurrency)
+            assert euro == EURCurrency(val=Decimal(2))
+        timer.now = 61
+        await converter.exchange(USDCurrency(val=Decimal(4)), EURCurrency)
+
+    asyncio.run(run())
+    assert calls == ["/convert/usd/eur", "/convert/usd/eur"]
+
+
+def test_concurrent_exchange_shares_one_fetch():
+    calls: list[str] = []
+    converter = CurrencyMeUkClient(make_client(calls))
+
+    async def run():
+        usd = USDCurrency(val=Decimal(2))
+        return await asyncio.gather(*(converter.exchange(usd, EURCurrency) for _ in range(20)))
+
+    results = asyncio.run(run())
+    assert calls == ["/convert/usd/eur"]
+    assert all(euro.val == Decimal(1) for euro in results)
+
+
+def test_concurrent_exchange_shares_failure():
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        return httpx.Response(500)
+
+    calls: list[str] = []
+    converter = CurrencyMeUkClient(BaseClient(transport=httpx.MockTransport(handler)))
+
+    async def run():
+        usd = USDCurrency(val=Decimal(2))
+        coros = (converter.exchange(usd, EURCurrency) for _ in range(5))
+        return await asyncio.gather(*coros, return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(isinstance(result, RequestFailed) for result in results)
+
+
+def test_exchange_many_fetches_each_rate_once():
+    calls: list[str] = []
+    converter = CurrencyMeUkClient(make_client(calls))
+    amounts = [USDCurrency(val=Decimal(i)) for i in range(100)] + [EURCurrency(val=Decimal(8))]
+
+    results = asyncio.run(converter.exchange_many(amounts, USDCurrency))
+    assert calls == ["/convert/eur/usd"]
+    assert [usd.val for usd in results] == [Decimal(i) for i in range(100)] + [Decimal(4)]
+    assert all(isinstance(usd, USDCurrency) for usd in results)
+
+
+def test_exchange_at_uses_rate_in_effect(tmp_path):
+    calls: list[str] = []
+    history = RateHistory(tmp_path / "rates.db")
+    history.record(USDToEur, Decimal("0.8"), at=datetime(2024, 1, 1))
+    history.record(USDToEur, Decimal("0.9"), at=datetime(2024, 2, 1))
+    history.close()
+
+    converter = CurrencyMeUkClient(make_client(calls), history=RateHistory(tmp_path / "rates.db"))
+    usd = USDCurrency(val=Decimal(10))
+    euros = converter.exchange_at(
+        [(usd, datetime(2024, 1, 15)), (usd, datetime(2024, 3, 1)), (usd, datetime(2024, 2, 1))],
+        EURCurrency,
+    )
+    assert [euro.val for euro in euros] == [Decimal(8), Decimal(9), Decimal(9)]
+    assert calls == []
+
+    with pytest.raises(RateNotAvailable):
+        converter.exchange_at([(usd, datetime(2023, 12, 31))], EURCurrency)
+
+    asyncio.run(converter.exchange(usd, EURCurrency))
+    assert converter.exchange_at([(usd, datetime.now())], EURCurrency)[0].val == Decimal(5)
+
+
+def test_rate_history_can_be_shared_between_threads(tmp_path):
+    history = RateHistory(tmp_path / "rates.db")
+
+    def record(day: int) -> None:
+        for hour in range(24):
+            history.record(USDToEur, Decimal(day), at=datetime(2024, 1, day, hour))
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(record, range(1, 29)))
+    history.close()
+
+    reloaded = RateHistory(tmp_path / "rates.db")
+    assert len(reloaded.series(USDToEur)) == 28 * 24
+    assert reloaded.rate_at(USDToEur, datetime(2024, 1, 5, 12)) == Decimal(5)
+
+
+class StandInConverter(BaseConverter):
+    mapping = {USDToEur: "", EURToUSD: ""}
+
+    def __init__(self, rate: str, delay: float = 0, fail: bool = False):
+        super().__init__(client=BaseClient())
+        self.rate = Decimal(rate)
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    async def fetch_rate(self, pair: FromToExchange) -> Decimal:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("provider is down")
+        return self.rate
+
+
+def test_hedged_converter_races_slow_provider():
+    slow = StandInConverter("0.5", delay=1)
+    fast = StandInConverter("0.6", delay=0.01)
+    converter = HedgedConverter([slow, fast], hedge_after=0.02)
+
+    euro = asyncio.run(converter.exchange(USDCurrency(val=Decimal(10)), EURCurrency))
+    assert euro.val == Decimal(6)
+    assert converter.ranked(USDToEur) == [fast, slow]
+
+
+def test_hedged_converter_ranks_late_losers_behind_the_winner():
+    first = StandInConverter("0.5", delay=0.05)
+    hedge = StandInConverter("0.6", delay=1)
+    converter = HedgedConverter([first, hedge], hedge_after=0.02)
+
+    # the hedge was cut short after a shorter time than the winner took, that's no reason to
+    # rank it first
+    euro = asyncio.run(converter.exchange(USDCurrency(val=Decimal(10)), EURCurrency))
+    assert euro.val == Decimal(5)
+    assert converter.ranked(USDToEur) == [first, hedge]
+
+
+def test_hedged_converter_fails_over():
+    broken = StandInConverter("0.5", fail=True)
+    healthy = StandInConverter("0.7", delay=0.01)
+    converter = HedgedConverter([broken, healthy], hedge_after=10)
+
+    euro = asyncio.run(converter.exchange(USDCurrency(val=Decimal(10)), EURCurrency))
+    assert euro.val == Decimal(7)
+    assert converter.ranked(USDToEur) == [healthy, broken]
+
+    converter = HedgedConverter([StandInConverter("1", fail=True)])
+    with pytest.raises(RuntimeError):
+        asyncio.run(converter.exchange(USDCurrency(val=Decimal(10)), EURCurrency))
+
+
+class GBPCurrency(BaseCurrency[Literal["GBP"]]):  # type: ignore (only exists in tests)
+    c_type: Literal["GBP"] = "GBP"
+
+
+GBPToUSD = FromToExchange(from_=GBPCurrency, to=USDCurrency)  # type: ignore
+
+
+def test_rate_graph_triangulates_over_cached_rates():
+    usd_eur = StandInConverter("0.5")
+    usd_eur.mapping = {USDToEur: ""}
+    gbp_usd = StandInConverter("1.25")
+    gbp_usd.mapping = {GBPToUSD: ""}
+    graph = RateGraph([usd_eur, gbp_usd])
+
+    assert graph.mapping[FromToExchange(from_=GBPCurrency, to=EURCurrency)] == (  # type: ignore
+        "GBPCurrency->USDCurrency->EURCurrency"
+    )
+
+    async def run():
+        gbp = GBPCurrency(val=Decimal(8))
+        return [await graph.exchange(gbp, EURCurrency) for _ in range(3)]  # type: ignore
+
+    assert [euro.val for euro in asyncio.run(run())] == [Decimal(5)] * 3
+    assert (usd_eur.calls, gbp_usd.calls) == (1, 1)
+
+    usd = asyncio.run(graph.exchange(EURCurrency(val=Decimal(5)), USDCurrency))
+    assert usd.val == Decimal(10)
+    assert usd_eur.calls == 1
+
+
+def test_refresher_serves_snapshot_and_stops_with_client():
+    provider = StandInConverter("0.5")
+
+    async def run():
+        await provider.start_refresher(interval=0.01)
+        euros = [await provider.exchange(USDCurrency(val=Decimal(2)), EURCurrency)]
+        assert provider.calls == len(provider.mapping)
+
+        provider.rate, provider.fail = Decimal("0.25"), True
+        await asyncio.sleep(0.05)
+        # refreshes fail, so the last good rate is still served
+        assert USDToEur in provider.refresh_errors
+        euros.append(await provider.exchange(USDCurrency(val=Decimal(2)), EURCurrency))
+
+        provider.fail = False
+        await asyncio.sleep(0.05)
+        euros.append(await provider.exchange(USDCurrency(val=Decimal(2)), EURCurrency))
+
+        await provider.client.aclose()
+        assert provider._refresher is None
+        return euros
+
+    euros = asyncio.run(run())
+    assert [euro.val for euro in euros] == [Decimal(1), Decimal(1), Decimal("0.5")]
+
+
+def test_refresher_needs_an_interval_without_a_ttl():
+    graph = RateGraph([StandInConverter("0.5")])
+    with pytest.raises(ValueError):
+        asyncio.run(graph.start_refresher())
+    assert graph._refresher is None
+
+
+def test_answer_scanner_stops_reading_early():
+    page = [b"<html><body>", b"<input type='text' i", b'd="answer" value="0.9', b'2"/>']
+    page += [b"<p>rest of the page</p>"] * 100
+    sent: list[bytes] = []
+
+    async def body():
+        for chunk in page:
+            sent.append(chunk)
+            yield chunk
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=body())
+
+    converter = CurrencyMeUkClient(BaseClient(transport=httpx.MockTransport(handler)))
+    euro = asyncio.run(converter.exchange(USDCurrency(val=Decimal(100)), EURCurrency))
+    assert euro.val == Decimal(92)
+    assert len(sent) == 4
+
+
+def test_answer_scanner_ignores_data_attributes():
+    scanner = AnswerScanner()
+    assert scanner.feed(b'<input data-id="answer" value="2">') is None
+    assert scanner.feed(b'<input data-value="1" id="answer" value="0.9">') == "0.9"
+
+
+def test_answer_falls_back_to_html_parser():
+    scanner = AnswerScanner()
+    assert scanner.feed(b'<input data-x=">" id="answer" value="1.5">') is None
+    assert parse_answer(b'<input data-x=">" id="answer" value="1.5">') == "1.5"
@@ -1,8 +1,17 @@
-from decimal import Decimal
+from decimal import ROUND_HALF_UP, Decimal
 
 import pytest
 
-from fastexchange import CantCompareException, EURCurrency, USDCurrency
+from fastexchange import (
+    CantCompareException,
+    CurrencyBatch,
+    EURCurrency,
+    MinorUnits,
+    Money,
+    USDCurrency,
+    UsdtTrcToken,
+)
+from fastexchange.currency import CurrencyEnum
 
 
 def test_c_interaction():
@@ -13,3 +22,48 @@ def test_c_interaction():
 
     with pytest.raises(CantCompareException):
         usd -= EURCurrency(val=Decimal(3))  # type: ignore (should always raise type error)
+
+
+def test_trusted_arithmetic_matches_validated():
+    usd = USDCurrency(val=Decimal("1.5")) + USDCurrency(val=Decimal("2.5"))
+    assert usd == USDCurrency(val=Decimal(4))
+    assert usd.model_dump() == USDCurrency(val=Decimal(4)).model_dump()
+    # same state as a validated instance, down to pydantic's bookkeeping
+    validated = USDCurrency(c_type=usd.c_type, val=Decimal(4))
+    assert (usd.model_fields_set, usd.model_extra) == (validated.model_fields_set, None)
+    assert usd.model_copy(update={"val": Decimal(1)}) == USDCurrency(val=Decimal(1))
+
+    euro = usd.convert_to(EURCurrency(val=Decimal(0)).c_type, Decimal("0.5"))
+    assert isinstance(euro, EURCurrency)
+    assert euro.val == Decimal(2)
+
+
+def test_money_interaction():
+    ledger = [Money.from_model(USDCurrency(val=Decimal(i))) for i in range(5)]
+    total = Money(USDCurrency(val=Decimal(0)).c_type, Decimal(0))
+    for money in ledger:
+        total += money
+    assert total.to_model() == USDCurrency(val=Decimal(10))
+    assert ledger[0] < ledger[1]
+
+    with pytest.raises(CantCompareException):
+        total -= Money.from_model(EURCurrency(val=Decimal(3)))  # type: ignore (should always raise type error)
+
+
+def test_minor_units_round_at_the_boundaries_only():
+    usd = USDCurrency(val=Decimal("10.505")).to_minor()
+    assert usd == MinorUnits(USDCurrency, 1050)
+    assert USDCurrency(val=Decimal("10.505")).to_minor(ROUND_HALF_UP).units == 1051
+
+    ledger = [MinorUnits(USDCurrency, 1) for _ in range(10)]
+    assert MinorUnits.total(USDCurrency, ledger).to_model() == USDCurrency(val=Decimal("0.10"))
+    assert len({usd, usd + ledger[0] - ledger[0]}) == 1
+    batch = CurrencyBatch(CurrencyEnum.USD, [m.units for m in ledger], USDCurrency.minor_scale)
+    assert batch.sum() == MinorUnits.total(USDCurrency, ledger).to_model()
+
+    token = UsdtTrcToken(val=Decimal("1.234567")).to_minor()
+    assert token.units == 1_234_567
+    assert token.convert_to(EURCurrency, Decimal("0.5")) == MinorUnits(EURCurrency, 62)
+
+    with pytest.raises(CantCompareException):
+        usd < token  # type: ignore (should always raise type error)
@@ -0,0 +1,203 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+from fastexchange.http import BaseClient, ClientRegistry
+from fastexchange.httpcache import CachedResponse, DiskStore, MemoryStore, ResponseCache
+from fastexchange.ratelimit import AdaptiveConcurrency, RateLimiter, retry_after
+
+
+def test_throttled_requests_are_retried_after_backing_off():
+    statuses = [429, 503, 200]
+    seen: list[float] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(time.monotonic())
+        status = statuses.pop(0)
+        return httpx.Response(status, headers={"Retry-After": "0.05"} if status == 429 else {})
+
+    limiter = RateLimiter(backoff=0.01)
+    client = BaseClient(transport=httpx.MockTransport(handler), limiter=limiter)
+
+    resp = asyncio.run(client.get("https://tronscan.test/api"))
+    assert resp.status_code == 200
+    assert len(seen) == 3
+    assert seen[1] - seen[0] >= 0.05
+    assert limiter.for_host("tronscan.test").concurrency.limit < limiter.initial_concurrency
+
+
+def test_gives_up_after_max_retries():
+    calls: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(429)
+
+    limiter = RateLimiter(max_retries=2, backoff=0)
+    client = BaseClient(transport=httpx.MockTransport(handler), limiter=limiter)
+    assert asyncio.run(client.get("https://tronscan.test/api")).status_code == 429
+    assert len(calls) == 3
+
+
+def test_a_burst_of_throttles_shrinks_the_limit_once():
+    now = [0.0]
+    concurrency = AdaptiveConcurrency(initial=32, cooldown=1, timer=lambda: now[0])
+    for _ in range(5):
+        concurrency.on_throttle()
+    assert concurrency.limit == 16
+    now[0] = 1.5
+    concurrency.on_throttle()
+    assert concurrency.limit == 8
+
+
+def test_limiter_is_shared_across_event_loops():
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.01)  # so the requests queue for the single slot
+        return httpx.Response(200)
+
+    registry = ClientRegistry(transport=httpx.MockTransport(handler))
+    registry.configure(limiter=RateLimiter(initial_concurrency=1))
+
+    async def burst() -> list[int]:
+        client = registry.get()
+        responses = await asyncio.gather(
+            *(client.get("https://tronscan.test/api") for _ in range(3))
+        )
+        return [resp.status_code for resp in responses]
+
+    assert asyncio.run(burst()) == [200] * 3
+    assert asyncio.run(burst()) == [200] * 3
+
+
+def test_retry_after_dates_without_a_zone_are_utc():
+    resp = httpx.Response(429, headers={"Retry-After": "Thu, 01 Jan 2037 00:00:00 -0000"})
+    assert retry_after(resp) > 0
+
+
+def test_token_bucket_paces_requests_per_host():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200)
+
+    client = BaseClient(transport=httpx.MockTransport(handler), limiter=RateLimiter(rate=100))
+
+    async def run():
+        started = time.monotonic()
+        await asyncio.gather(*(client.get("https://tronscan.test/api") for _ in range(6)))
+        return time.monotonic() - started
+
+    assert asyncio.run(run()) >= 0.05
+
+
+def test_registry_keeps_one_client_per_event_loop():
+    registry = ClientRegistry()
+
+    async def current():
+        client = registry.get()
+        assert registry.get() is client
+        return client
+
+    first, second = asyncio.run(current()), asyncio.run(current())
+    assert first is not second
+
+    async def closed():
+        client = registry.get()
+        await registry.aclose()
+        return client, registry.get()
+
+    before, after = asyncio.run(closed())
+    assert before is not after
+
+    with pytest.raises(RuntimeError):
+        registry.get()
+
+
+def test_response_cache_serves_fresh_and_revalidates_stale():
+    now = [1_000_000.0]
+    seen: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304, headers={"Cache-Control": "max-age=60"})
+        return httpx.Response(
+            200, headers={"Cache-Control": "max-age=60", "ETag": '"v1"'}, content=b"page"
+        )
+
+    cache = ResponseCache(timer=lambda: now[0])
+    client = BaseClient(transport=httpx.MockTransport(handler), cache=cache)
+
+    async def get(**headers: str) -> httpx.Response:
+        return await client.get("https://tronscan.test/api", headers=headers)
+
+    assert asyncio.run(get()).content == b"page"
+    assert asyncio.run(get()).content == b"page"
+    assert len(seen) == 1
+
+    # different headers never share an entry
+    assert asyncio.run(get(authorization="other")).content == b"page"
+    assert len(seen) == 2
+
+    now[0] += 61
+    resp = asyncio.run(get())
+    assert (resp.status_code, resp.content) == (200, b"page")
+    assert seen[-1].headers["If-None-Match"] == '"v1"'
+    asyncio.run(get())
+    assert len(seen) == 3
+
+
+def test_response_cache_on_disk_outlives_the_client(tmp_path):
+    calls: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, headers={"Cache-Control": "max-age=60"}, content=b"page")
+
+    def make_client() -> BaseClient:
+        store = DiskStore(tmp_path / "http.sqlite3")
+        return BaseClient(transport=httpx.MockTransport(handler), cache=ResponseCache(store))
+
+    assert asyncio.run(make_client().get("https://tronscan.test/api")).content == b"page"
+    assert asyncio.run(make_client().get("https://tronscan.test/api")).content == b"page"
+    assert len(calls) == 1
+
+
+def test_streamed_responses_are_not_cached():
+    sent: list[bytes] = []
+
+    async def body():
+        for chunk in [b"first", b"second"]:
+            sent.append(chunk)
+            yield chunk
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, headers={"Cache-Control": "max-age=60"}, content=body())
+
+    cache = ResponseCache()
+    client = BaseClient(transport=httpx.MockTransport(handler), cache=cache)
+
+    async def first_chunk() -> bytes:
+        async with client.stream("GET", "https://tronscan.test/api") as resp:
+            return await resp.aiter_bytes().__anext__()
+
+    assert asyncio.run(first_chunk()) == b"first"
+    assert sent == [b"first"]
+    assert len(cache.store) == 0  # type: ignore (MemoryStore has a length)
+
+
+@pytest.mark.parametrize("disk", [False, True])
+def test_response_stores_can_be_shared_between_threads(tmp_path, disk: bool):
+    store = DiskStore(tmp_path / "http.sqlite3", maxsize=64) if disk else MemoryStore(maxsize=64)
+
+    def hammer(worker: int) -> None:
+        for i in range(200):
+            key = f"{worker}-{i % 20}"
+            store.set(key, CachedResponse(200, [], b"page", 0))
+            store.get(key)
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(hammer, range(8)))
+    store.set("after", CachedResponse(200, [], b"page", 0))
+    assert store.get("after") == CachedResponse(200, [], b"page", 0)
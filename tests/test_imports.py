@@ -0,0 +1,49 @@
+import subprocess
+import sys
+
+HEAVY_MODULES = ["httpx", "lxml", "fastexchange.http", "fastexchange.crypto.schema"]
+
+
+def imported_modules(code: str) -> set[str]:
+    """Modules loaded after running `code` in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, "-c", f"{code}\nimport sys\nprint(*sys.modules)"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return set(result.stdout.split())
+
+
+def test_importing_the_package_imports_nothing_heavy():
+    modules = imported_modules("import fastexchange")
+    assert "pydantic" not in modules
+    assert modules.isdisjoint(HEAVY_MODULES)
+
+
+def test_currencies_dont_pull_in_http_or_crypto():
+    modules = imported_modules("from fastexchange import USDCurrency, AnyCurrency")
+    assert "fastexchange.currency" in modules
+    assert modules.isdisjoint(HEAVY_MODULES)
+
+
+def test_type_adapters_build_their_schema_on_first_use():
+    code = (
+        "from fastexchange.currency import AnyCurrency\n"
+        "from fastexchange.crypto.types import AnyCryptoToken\n"
+        "assert not AnyCurrency.pydantic_complete and not AnyCryptoToken.pydantic_complete\n"
+        "AnyCurrency.validate_python({'c_type': 'USD', 'val': '1'})\n"
+        "assert AnyCurrency.pydantic_complete\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_names_are_loaded_on_access():
+    modules = imported_modules("import fastexchange; fastexchange.Trc20Gateway")
+    assert {"httpx", "fastexchange.crypto.usdt"} <= modules
+
+
+def test_all_lists_every_lazy_name():
+    import fastexchange
+
+    assert fastexchange.__all__ == list(fastexchange._MODULES)
@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta
+
+from fastexchange.crypto.matching import PaymentMatcher, PaymentStatus
+from fastexchange.crypto.schema import TransferSummary
+
+NOW = datetime(2024, 1, 1, 12)
+
+
+def transfer(
+    tid: str,
+    to: str,
+    quant: int,
+    at: datetime = NOW,
+    confirmed: bool = True,
+    contract: str = "TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6t",
+):
+    return TransferSummary(
+        transaction_id=tid,
+        from_address="TPayer",
+        to_address=to,
+        contract_address=contract,
+        quant=quant,
+        block=1,
+        block_ts=int(at.timestamp() * 1000),
+        confirmed=confirmed,
+    )
+
+
+def test_matches_exact_close_partial_and_over_payments():
+    matcher = PaymentMatcher(tolerance=10)
+    expires = NOW + timedelta(hours=1)
+    matcher.add("exact", "TShop", 5_000_000, expires)
+    matcher.add("close", "TShop", 7_000_000, expires)
+    matcher.add("partial", "TOther", 3_000_000, expires)
+    matcher.add("over", "TThird", 1_000_000, expires)
+
+    result = matcher.match(
+        [
+            transfer("t1", "TShop", 5_000_000),
+            transfer("t2", "TShop", 6_999_995),
+            transfer("t3", "TOther", 1_000_000),
+            transfer("t4", "TThird", 2_000_000),
+            transfer("t5", "TNobody", 1_000_000),
+            transfer("t6", "TOther", 2_000_000, confirmed=False),
+        ]
+    )
+    assert [(p.invoice.invoice_id, p.status) for p in result.payments] == [
+        ("exact", PaymentStatus.PAID),
+        ("close", PaymentStatus.PAID),
+        ("partial", PaymentStatus.PARTIAL),
+        ("over", PaymentStatus.OVERPAID),
+    ]
+    assert [t.transaction_id for t in result.unmatched] == ["t5", "t6"]
+    assert list(matcher.invoices) == ["partial"]
+
+    # the rest arrives, and a page repeating an applied transfer doesn't count twice
+    result = matcher.match(
+        [transfer("t3", "TOther", 1_000_000), transfer("t6", "TOther", 2_000_000)]
+    )
+    assert [(p.transfer.transaction_id, p.status) for p in result.payments] == [
+        ("t6", PaymentStatus.PAID)
+    ]
+    assert len(matcher) == 0
+
+
+def test_expired_invoices_stop_matching():
+    matcher = PaymentMatcher()
+    matcher.add("soon", "TShop", 1_000_000, NOW + timedelta(minutes=5))
+    matcher.add("later", "TShop", 2_000_000, NOW + timedelta(hours=1))
+
+    late = NOW + timedelta(minutes=10)
+    assert not matcher.match([transfer("t1", "TOther", 1_000_000, at=late)]).payments
+    assert [i.invoice_id for i in matcher.expire(late)] == ["soon"]
+    payment = matcher.match([transfer("t2", "TShop", 1_000_000, at=late)]).payments[0]
+    assert (payment.invoice.invoice_id, payment.status) == ("later", PaymentStatus.PARTIAL)
+
+
+def test_other_tokens_and_odd_amounts_are_left_unmatched():
+    matcher = PaymentMatcher()
+    expires = NOW + timedelta(hours=1)
+    matcher.add("small", "TShop", 1_000_000, expires)
+    matcher.add("large", "TShop", 5_000_000, expires)
+
+    result = matcher.match(
+        [
+            transfer("t1", "TShop", 1_000_000, contract="TXLAQ63Xg1NAzckPwKHvzw7CSEmLMEqcdj"),
+            transfer("t2", "TShop", 3_000_000),
+        ]
+    )
+    assert not result.payments
+    assert [t.transaction_id for t in result.unmatched] == ["t1", "t2"]
+
+    matcher.best_fit = True
+    payment = matcher.match([transfer("t2", "TShop", 3_000_000)]).payments[0]
+    assert (payment.invoice.invoice_id, payment.status) == ("large", PaymentStatus.PARTIAL)
+
+
+def test_applied_transfers_are_forgotten_after_history():
+    matcher = PaymentMatcher(history=1)
+    expires = NOW + timedelta(hours=1)
+    for i in range(3):
+        matcher.add(f"inv{i}", "TShop", 1_000_000, expires)
+        matcher.match([transfer(f"t{i}", "TShop", 1_000_000)])
+
+    # only the last one is still recognised as applied
+    matcher.add("again", "TShop", 1_000_000, expires)
+    assert not matcher.match([transfer("t2", "TShop", 1_000_000)]).payments
+    payment = matcher.match([transfer("t0", "TShop", 1_000_000)]).payments[0]
+    assert payment.invoice.invoice_id == "again"
@@ -0,0 +1,84 @@
+import asyncio
+from decimal import Decimal
+
+import httpx
+import pytest
+
+from fastexchange import CurrencyMeUkClient, EURCurrency, USDCurrency, metrics
+from fastexchange.http import BaseClient
+from fastexchange.metrics import Metrics
+
+from .test_converter import make_client
+
+
+@pytest.fixture
+def recorded():
+    collector = metrics.enable()
+    assert isinstance(collector, Metrics)
+    yield collector
+    metrics.disable()
+
+
+def test_records_requests_parsing_and_cache_lookups(recorded):
+    converter = CurrencyMeUkClient(make_client([]))
+
+    async def run():
+        for _ in range(3):
+            await converter.exchange(USDCurrency(val=Decimal(4)), EURCurrency)
+
+    asyncio.run(run())
+    snapshot = recorded.snapshot()
+    assert snapshot.count("http.request", "www.currency.me.uk") == 1
+    assert snapshot.count("converter.parse", "CurrencyMeUkClient") == 1
+    assert snapshot.hit_ratio() == pytest.approx(2 / 3)
+
+
+def test_records_errors_and_response_sizes(recorded):
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/down":
+            raise httpx.ConnectError("down")
+        return httpx.Response(200, content=b"x" * 100)
+
+    client = BaseClient(transport=httpx.MockTransport(handler))
+
+    async def run():
+        await client.get("https://tronscan.test/api")
+        with pytest.raises(httpx.ConnectError):
+            await client.get("https://tronscan.test/down")
+
+    asyncio.run(run())
+    snapshot = recorded.snapshot()
+    assert snapshot.histograms[("http.response_bytes", "tronscan.test")].total == 100
+    assert snapshot.count("http.error", "tronscan.test") == 1
+
+
+def test_trace_times_connection_steps(recorded):
+    trace = metrics.http_trace("tronscan.test")
+
+    async def run():
+        for event in [
+            "connection.connect_tcp.started",
+            "connection.connect_tcp.complete",
+            "http11.send_request_headers.started",
+            "http11.send_request_headers.complete",
+            "http11.receive_response_headers.started",
+            "http11.receive_response_headers.complete",
+        ]:
+            await trace(event, {})
+
+    asyncio.run(run())
+    snapshot = recorded.snapshot()
+    assert snapshot.count("http.connect", "tronscan.test") == 1
+    assert snapshot.count("http.ttfb", "tronscan.test") == 1
+    assert snapshot.count("http.tls", "tronscan.test") == 0
+
+
+def test_disabled_records_nothing():
+    collector = Metrics()
+    assert metrics.recorder is None
+    watch = metrics.Stopwatch("converter.parse", "x")
+    with watch:
+        pass
+    watch.report()
+    assert collector.snapshot().histograms == {}
+    assert watch.elapsed == 0
@@ -0,0 +1,53 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from decimal import Decimal
+
+import pytest
+
+from fastexchange import CurrencyMeUkClient, EURCurrency, USDCurrency
+from fastexchange.http import BaseClient
+from fastexchange.sync import BackgroundLoop, SyncConverter
+
+from .test_converter import make_client
+
+
+def test_sync_converter_shares_loop_and_cache_across_threads():
+    calls: list[str] = []
+    loop = BackgroundLoop()
+    converter = SyncConverter(CurrencyMeUkClient(make_client(calls)), loop)
+
+    def convert(amount: int) -> EURCurrency:
+        return converter.exchange(USDCurrency(val=Decimal(amount)), EURCurrency)
+
+    with ThreadPoolExecutor(8) as pool:
+        euros = list(pool.map(convert, range(50)))
+
+    assert [euro.val for euro in euros] == [Decimal(amount) / 2 for amount in range(50)]
+    assert calls == ["/convert/usd/eur"]
+
+    # the shared client of the background loop comes from the registry
+    assert isinstance(loop.run(_current_client()), BaseClient)
+    loop.stop()
+
+
+async def _current_client() -> BaseClient:
+    return CurrencyMeUkClient().client
+
+
+def test_timed_out_calls_are_cancelled():
+    loop = BackgroundLoop()
+    cancelled: list[bool] = []
+
+    async def slow() -> None:
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    with pytest.raises(TimeoutError):
+        loop.run(slow(), timeout=0.01)
+    time.sleep(0.05)
+    assert cancelled == [True]
+    loop.stop()
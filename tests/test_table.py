@@ -0,0 +1,50 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+
+from fastexchange.crypto.schema import Transfers
+from fastexchange.crypto.table import TransferTable
+from fastexchange.crypto.types import UsdtTrcToken
+
+from .test_usdt import WALLET, make_transfer
+
+
+def test_transfer_table_aggregates():
+    page = Transfers.model_validate(
+        {"total": 6, "rangeTotal": 6, "token_transfers": [make_transfer(i) for i in range(6)]}
+    )
+    table = TransferTable.from_page(page)
+
+    assert len(table) == 6
+    assert table.total() == UsdtTrcToken(val=Decimal(21))
+    assert table.received_by_address() == {WALLET: UsdtTrcToken(val=Decimal(21))}
+    assert table.sent_by_address()["TSender0"] == UsdtTrcToken(val=Decimal(1 + 4))
+
+    sender = table.select(from_address="TSender1")
+    assert sender.transaction_ids == ["tx1", "tx4"]
+    assert sender.to_usd().sum().val == Decimal(2 + 5)
+    assert table.to_usd(Decimal(2)).sum().val == Decimal("10.5")
+    assert [t.transaction_id for t in page.token_transfers] == table.transaction_ids
+
+    buckets = table.sum_by_period(timedelta(seconds=3))
+    assert sum(token.val for token in buckets.values()) == Decimal(21)
+    assert table.to_token() == [transfer.to_minor() for transfer in page.token_transfers]
+    assert table.to_token()[0].to_model() == page.token_transfers[0].to_token()
+
+
+def test_transfer_table_keeps_other_tokens_apart():
+    other = {**make_transfer(6), "contract_address": "TEthTokenContract"}
+    huge = {**make_transfer(7), "quant": str(10**20)}
+    page = Transfers.model_validate(
+        {"total": 3, "rangeTotal": 3, "token_transfers": [make_transfer(0), other, huge]}
+    )
+    table = TransferTable.from_transfers(page.token_transfers[:2])
+
+    assert table.total() == UsdtTrcToken(val=Decimal(1))
+    assert list(table.sum_by_period().values()) == [UsdtTrcToken(val=Decimal(1))]
+    assert table.select(contract="TEthTokenContract").transaction_ids == ["tx6"]
+
+    with pytest.raises(ValueError):
+        table.extend(page.token_transfers[2:])
+    assert len(table) == len(table.quant) == 2
@@ -0,0 +1,241 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any
+
+import httpx
+import pytest
+
+from fastexchange.crypto.schema import TokenTransfer
+from fastexchange.crypto.store import TransferStore
+from fastexchange.crypto.usdt import Trc20Gateway, WatchEvent
+from fastexchange.http import BaseClient, RequestFailed
+
+WALLET = "TWalletAddress"
+BASE_TS = 1_700_000_000_000
+
+
+def make_transfer(index: int, confirmed: bool = True) -> dict[str, Any]:
+    return {
+        "transaction_id": f"tx{index}",
+        "status": 0,
+        "block_ts": BASE_TS + index * 1000,
+        "from_address": f"TSender{index % 3}",
+        "to_address": WALLET,
+        "block": 50_000_000 + index,
+        "contract_address": "TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6t",
+        "quant": str(1_000_000 * (index + 1)),
+        "approval_amount": 0,
+        "event_type": "Transfer",
+        "contract_type": "trc20",
+        "confirmed": confirmed,
+        "contractRet": "SUCCESS",
+        "finalResult": "SUCCESS",
+        "tokenInfo": {},
+        "fromAddressIsContract": False,
+        "toAddressIsContract": False,
+        "revert": False,
+        "riskTransaction": False,
+    }
+
+
+def make_gateway(history: list[dict[str, Any]], requests: list[httpx.Request]) -> Trc20Gateway:
+    """Gateway against a fake tronscan serving `history`, which is sorted newest first"""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        start = int(request.url.params["start"])
+        limit = int(request.url.params["limit"])
+        page = history[start : start + limit]
+        return httpx.Response(
+            200,
+            json={"total": len(history), "rangeTotal": len(history), "token_transfers": page},
+        )
+
+    return Trc20Gateway(BaseClient(transport=httpx.MockTransport(handler)))
+
+
+@pytest.mark.parametrize("prefetch", [0, 4])
+def test_iter_transfers_walks_every_page(prefetch: int):
+    history = [make_transfer(i) for i in reversed(range(120))]
+    requests: list[httpx.Request] = []
+    gateway = make_gateway(history, requests)
+
+    async def run():
+        transfers = gateway.iter_transfers(WALLET, prefetch=prefetch)
+        return [transfer.transaction_id async for transfer in transfers]
+
+    assert asyncio.run(run()) == [f"tx{i}" for i in reversed(range(120))]
+    assert sorted(int(request.url.params["start"]) for request in requests) == [0, 50, 100]
+
+
+def test_iter_transfers_stops_at_since():
+    history = [make_transfer(i) for i in reversed(range(120))]
+    requests: list[httpx.Request] = []
+    gateway = make_gateway(history, requests)
+    since = datetime.fromtimestamp((BASE_TS + 110 * 1000) / 1000)
+
+    async def run():
+        transfers = gateway.iter_transfers(WALLET, since=since, prefetch=1)
+        return [transfer.transaction_id async for transfer in transfers]
+
+    assert asyncio.run(run()) == [f"tx{i}" for i in reversed(range(110, 120))]
+
+
+def test_sync_only_fetches_after_checkpoint():
+    history = [make_transfer(i, confirmed=i < 110) for i in reversed(range(120))]
+    requests: list[httpx.Request] = []
+    gateway = make_gateway(history, requests)
+    store = TransferStore()
+
+    changed = asyncio.run(gateway.sync(WALLET, store))
+    assert len(changed) == 120
+    assert store.checkpoint(WALLET) == (50_000_119, datetime.fromtimestamp(BASE_TS / 1000 + 119))
+
+    # the unconfirmed transfers settle and a new one arrives
+    history[:] = [make_transfer(i) for i in reversed(range(121))]
+    requests.clear()
+    changed = asyncio.run(gateway.sync(WALLET, store))
+
+    assert sorted(transfer.transaction_id for transfer in changed) == sorted(
+        f"tx{i}" for i in range(110, 121)
+    )
+    assert [request.url.params["start"] for request in requests] == ["0"]
+    assert all(transfer.confirmed for transfer in store.transfers(WALLET))
+
+
+def test_check_transactions_bounds_concurrency_and_collects_errors():
+    running = 0
+    peak = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.001)
+        running -= 1
+        if request.url.params["relatedAddress"] == "broken":
+            return httpx.Response(500)
+        return httpx.Response(200, json={"total": 1, "rangeTotal": 1, "token_transfers": []})
+
+    gateway = Trc20Gateway(BaseClient(transport=httpx.MockTransport(handler)))
+    wallets = [f"T{i}" for i in range(30)] + ["broken"]
+
+    result = asyncio.run(gateway.check_transactions(wallets, concurrency=4))
+    assert peak == 4
+    assert sorted(result.transfers) == sorted(wallets[:-1])
+    assert isinstance(result.errors["broken"], RequestFailed)
+
+    with pytest.raises(ValueError):
+        asyncio.run(gateway.check_transactions(wallets, concurrency=0))
+
+
+def test_summary_page_matches_full_page():
+    history = [make_transfer(i) for i in reversed(range(10))]
+    gateway = make_gateway(history, [])
+
+    async def run():
+        return (
+            await gateway.check_transaction(WALLET),
+            await gateway.check_transaction_summary(WALLET),
+        )
+
+    full, summary = asyncio.run(run())
+    for transfer, lean in zip(full.token_transfers, summary.token_transfers):
+        assert lean.transaction_id == transfer.transaction_id
+        assert lean.block_ts == transfer.block_ts
+        assert lean.to_token() == transfer.to_token()
+
+
+def test_watch_yields_new_transfers_once_and_confirmations():
+    history = [make_transfer(i, confirmed=i != 1) for i in reversed(range(2))]
+    requests: list[httpx.Request] = []
+    gateway = make_gateway(history, requests)
+    events: list[tuple[WatchEvent, str]] = []
+
+    async def arrive():
+        while not requests:
+            await asyncio.sleep(0.001)
+        history[:] = [make_transfer(i) for i in reversed(range(4))]
+
+    async def collect():
+        async for event in gateway.watch([WALLET], min_interval=0.005, max_interval=0.01):
+            assert event.transfer is not None
+            events.append((event.kind, event.transfer.transaction_id))
+
+    async def run():
+        arriving = asyncio.ensure_future(arrive())
+        try:
+            await asyncio.wait_for(collect(), 0.2)
+        except asyncio.TimeoutError:
+            pass
+        await arriving
+
+    asyncio.run(run())
+    assert sorted(events) == [
+        (WatchEvent.CONFIRMED, "tx1"),
+        (WatchEvent.NEW, "tx2"),
+        (WatchEvent.NEW, "tx3"),
+    ]
+    assert len(requests) > 3
+
+
+def test_watch_pages_back_to_what_it_has_seen():
+    history = [make_transfer(i) for i in reversed(range(10))]
+    requests: list[httpx.Request] = []
+    gateway = make_gateway(history, requests)
+
+    async def arrive():
+        while not requests:
+            await asyncio.sleep(0.001)
+        # a burst of transfers arrives, more than two pages of them
+        history[:] = [make_transfer(i) for i in reversed(range(130))]
+
+    async def collect():
+        seen: list[str] = []
+        async for event in gateway.watch([WALLET], min_interval=0.005):
+            assert event.kind is WatchEvent.NEW and event.transfer is not None
+            seen.append(event.transfer.transaction_id)
+            if len(seen) == 120:
+                return seen
+
+    async def main():
+        return (await asyncio.gather(collect(), arrive()))[0]
+
+    assert sorted(asyncio.run(main())) == sorted(f"tx{i}" for i in range(10, 130))
+
+
+@pytest.mark.parametrize(
+    "options",
+    [{"concurrency": 0}, {"min_interval": 0}, {"max_interval": 1}, {"backoff": 0.5}],
+)
+def test_watch_rejects_options_it_would_spin_on(options: dict[str, Any]):
+    gateway = make_gateway([], [])
+
+    async def run():
+        async for _ in gateway.watch([WALLET], **options):
+            pass
+
+    with pytest.raises(ValueError):
+        asyncio.run(asyncio.wait_for(run(), 1))
+
+
+def test_store_can_be_shared_between_threads():
+    store = TransferStore()
+    transfers = [TokenTransfer.model_validate(make_transfer(i)) for i in range(200)]
+
+    def write(worker: int) -> None:
+        for transfer in transfers[worker::4]:
+            store.save(WALLET, [transfer])
+
+    def read(_: int) -> None:
+        for _ in range(50):
+            store.transfers(WALLET)
+            store.oldest_unconfirmed(WALLET)
+
+    # writers and readers at the same time
+    with ThreadPoolExecutor(8) as pool:
+        jobs = [pool.submit(job, n) for n in range(4) for job in (write, read)]
+        for job in jobs:
+            job.result()
+    assert len(store.transfers(WALLET)) == 200